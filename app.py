@@ -1,19 +1,42 @@
 from config import app, db
 import stripe
-from flask import jsonify, request, make_response, redirect, url_for,send_file
-from models import Course, Student, Admin, Module, Message
+from flask import jsonify, request, make_response, redirect, url_for,send_file, stream_with_context, g
+from models import Course, Student, Admin, Module, Message, student_courses, admin_courses as admin_courses_table
 import jwt
 from functools import wraps
 import datetime
-from sqlalchemy.exc import IntegrityError
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from payments import create_checkout_session
+from enrollments import enqueue_enrollment, enrollment_writer
+from receipts import receipt_template, ReceiptCache, get_export_pool, stream_receipt_zip
 import io
-from sqlalchemy import and_
+import json
+import threading
+import time
+from sqlalchemy import func, insert, select, literal, update, delete
 from sqlalchemy.orm import joinedload
+from principals import principal_cache, load_principal, PRINCIPAL_MODELS
+from hashing import PasswordPoolBusy
+from catalog_cache import catalog_cache
+from search import search_emails
+from notifications import inbox_notifier, inbox_key
+from course_import import CourseImporter, PARSERS
+from db_pool import statement_timeout, pool_metrics
+from replica import replica_reads, replica_router, primary
+from serialization import serializer, only_columns
+from metrics import metrics_registry, render_prometheus
+from compression import compressed_cache
 
 
-stripe.api_key = 'sk_test_51PEpckRx876YYvellXk4uZw1hSPwac0nRQKYaCMb5QbYIpbgacTy6xEGf0x6A0JMXdEF17Igg111x9pL5wWFvd7300uTywvxxP'
+
+receipt_cache = ReceiptCache(app.config['RECEIPT_CACHE_SIZE'])
+
+
+# Logins and signups are shed with a 503 once the bcrypt pool is full, so cheap reads keep flowing
+@app.errorhandler(PasswordPoolBusy)
+def password_pool_busy(e):
+    response = make_response({"ERROR": str(e)}, 503)
+    response.headers["Retry-After"] = "1"
+    return response
 
 
 # Define your token_required decorator
@@ -25,9 +48,15 @@ def token_required(f):
             return make_response({"ERROR": "Where is your access token"}, 403)
         try:
             decode_data = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
-            current_user = Student.query.get(decode_data['id']) or Admin.query.get(decode_data['id'])
+            user_type = decode_data.get('user_type')
+            if user_type in PRINCIPAL_MODELS:
+                current_user = load_principal(user_type, decode_data['id'], decode_data.get('exp'))
+            else:
+                # Older tokens carry no user_type, so fall back to the uncached lookup
+                current_user = Student.query.get(decode_data['id']) or Admin.query.get(decode_data['id'])
             if not current_user:
                 return make_response({"ERROR": "User not found"}, 403)
+            g.principal_key = f"{type(current_user).__name__}:{current_user.id}"
         except Exception as e:
             return make_response({"ERROR": "Invalid access token"}, 403)
         return f(current_user, *args, **kwargs)
@@ -35,16 +64,78 @@ def token_required(f):
 
 
 
-#We can get all courses
+# Parse ?cursor=<id>&limit=<n> for keyset-paginated listings. limit is None when it is not a positive integer.
+def keyset_page_args(default_limit, max_limit, default_cursor=None):
+    cursor = request.args.get('cursor', default_cursor, type=int)
+    limit = request.args.get('limit', default_limit, type=int)
+    if limit < 1:
+        return cursor, None
+    return cursor, min(limit, max_limit)
+
+
+# Fields each listing returns, shared by its query's load_only and its serializer
+COURSE_LIST_FIELDS = ('id', 'title', 'description', 'thumbnail', 'price')
+ADMIN_COURSE_FIELDS = COURSE_LIST_FIELDS + ('admin_id',)
+MODULE_LIST_FIELDS = ('id', 'title', 'media', 'notes', 'position')
+ADMIN_MODULE_FIELDS = MODULE_LIST_FIELDS + ('course_id',)
+EMAIL_FIELDS = ('id', 'email')
+DASHBOARD_COURSE_FIELDS = COURSE_LIST_FIELDS + ('admin_email', 'module_count', 'unread_count')
+
+
+# Serve a catalog response from the shared cache, building it with `build` on a miss.
+# Returns None when `build` returns None (e.g. a missing course), which is never cached.
+# `cacheable` is checked on a miss; when it returns False the body is served without being stored.
+def cached_json_response(key, build, cacheable=None):
+    def build_current():
+        # A body built from a replica that hasn't caught up with the last course change would stay cached
+        # for the whole generation, so those rebuilds read from the primary
+        if g.get('use_replica') and not replica_router.current_as_of(catalog_cache.bumped_at()):
+            with primary():
+                return build()
+        return build()
+
+    body, etag = catalog_cache.get_or_build(key, build_current, cacheable)
+    if body is None:
+        return None
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Tells compress_response to reuse one compressed copy of this body
+    response.precompressed = True
+    return response
+
+
+#We can get all courses, one keyset page at a time (?cursor=<last id seen>&limit=<n>)
 @app.route('/course', methods=['GET'])
 # @token_required
+@replica_reads
 def get_all_courses():
     try:
-        courses = Course.query.all()
-        # Serialize the courses to JSON
-        
-        course_data = [course.to_dict(only=('id', 'title', 'description', 'thumbnail', 'price')) for course in courses]
-        return jsonify({'courses': course_data}), 200
+        cursor, limit = keyset_page_args(app.config['COURSE_PAGE_SIZE'], app.config['COURSE_PAGE_SIZE_MAX'], default_cursor=0)
+        if limit is None:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+
+        def build():
+            # Fetch one extra row to know whether another page follows
+            courses = (Course.query.options(only_columns(Course, COURSE_LIST_FIELDS))
+                       .filter(Course.id > cursor).order_by(Course.id).limit(limit + 1).all())
+            has_more = len(courses) > limit
+            courses = courses[:limit]
+
+            # Serialize the courses to JSON
+            serialize = serializer(Course, COURSE_LIST_FIELDS)
+            course_data = [serialize(course) for course in courses]
+            return jsonify({'courses': course_data, 'next_cursor': courses[-1].id if has_more else None}).get_data()
+
+        # Only the default page size, starting from the top or from a course that exists, is kept: any other
+        # cursor/limit pair is served fresh so clients can't fill the cache with one-off keys
+        def cacheable():
+            return limit == app.config['COURSE_PAGE_SIZE'] and (
+                cursor == 0 or db.session.scalar(select(Course.id).where(Course.id == cursor)) is not None)
+
+        # Strong ETag over the page contents so unchanged pages come back as 304 with no body
+        response = cached_json_response(f'courses:{cursor}:{limit}', build, cacheable)
+        response.headers['Cache-Control'] = f"public, max-age={app.config['COURSE_CACHE_MAX_AGE']}"
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve courses', 'message': str(e)}), 500
 
@@ -123,7 +214,7 @@ def signup_student():
     db.session.commit()
 
     # Generate JWT token for the new student
-    token = jwt.encode({'id': student.id, 'email': student.email, 'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=30)},
+    token = jwt.encode({'id': student.id, 'email': student.email, 'user_type': 'student', 'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=30)},
                        app.config['SECRET_KEY'], algorithm='HS256')
 
     return jsonify({'message': 'Student created successfully!', 'token': token}), 201
@@ -149,7 +240,7 @@ def signup_admin():
     db.session.commit()
 
     # Generate JWT token for the new admin
-    token = jwt.encode({'id': admin.id, 'email': admin.email, 'exp': datetime.datetime.now() + datetime.timedelta(minutes=30)},
+    token = jwt.encode({'id': admin.id, 'email': admin.email, 'user_type': 'admin', 'exp': datetime.datetime.now() + datetime.timedelta(minutes=30)},
                        app.config['SECRET_KEY'], algorithm='HS256')
 
     return jsonify({'message': 'Admin created successfully!', 'token': token}), 201
@@ -175,6 +266,7 @@ def student_profile(current_user):
         if 'password' in data:
             current_user.password_hash = data['password']
         db.session.commit()
+        principal_cache.evict('student', current_user.id)
         return jsonify({'message': 'Profile updated successfully!'}), 200
 
 
@@ -205,8 +297,11 @@ def admin_profile(current_user):
                 
                 admin.password_hash = data['password']
                 db.session.commit()
+                principal_cache.evict('admin', admin.id)
 
                 return jsonify({'message': 'Profile updated successfully!'}), 200
+            except PasswordPoolBusy:
+                raise
             except Exception as e:
                 return jsonify({'error': str(e)}), 500
         else:
@@ -217,10 +312,14 @@ def admin_profile(current_user):
 # This will get all courses a current student is enrolled
 @app.route('/courses/student', methods=['GET'])
 @token_required
+@replica_reads
 def get_student_courses(current_user):
     try:
-        student_courses = current_user.courses
-        course_data = [{'id': course.id, 'title': course.title, 'description': course.description, 'thumbnail': course.thumbnail, 'price': course.price} for course in student_courses]
+        enrolled = (Course.query.options(only_columns(Course, COURSE_LIST_FIELDS))
+                    .join(student_courses, student_courses.c.course_id == Course.id)
+                    .filter(student_courses.c.student_id == current_user.id).all())
+        serialize = serializer(Course, COURSE_LIST_FIELDS)
+        course_data = [serialize(course) for course in enrolled]
         
         return jsonify({'courses': course_data}), 200
     except Exception as e:
@@ -228,66 +327,175 @@ def get_student_courses(current_user):
 
 
 
+# Everything the student dashboard shows on load in two queries, however many courses the student is enrolled in:
+# each enrolled course with its admin's email, module count and unread messages from that admin, then the inbox total
+@app.route('/student/dashboard', methods=['GET'])
+@token_required
+@replica_reads
+def student_dashboard(current_user):
+    if not isinstance(current_user, Student):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    try:
+        module_count = select(func.count(Module.id)) \
+            .where(Module.course_id == Course.id).correlate(Course).scalar_subquery()
+        unread_from_admin = select(func.count(Message.id)) \
+            .where(Message.receiver_id == current_user.id, Message.admin_sender_id == Course.admin_id,
+                   Message.is_read.is_(False)) \
+            .correlate(Course).scalar_subquery()
+        courses = db.session.execute(
+            select(
+                *(getattr(Course, field) for field in COURSE_LIST_FIELDS),
+                Admin.email.label('admin_email'),
+                module_count.label('module_count'),
+                unread_from_admin.label('unread_count')
+            ).join(student_courses, student_courses.c.course_id == Course.id)
+            .join(Admin, Admin.id == Course.admin_id)
+            .where(student_courses.c.student_id == current_user.id)
+            .order_by(student_courses.c.enrolled_at.desc().nulls_last(), Course.id)
+        ).all()
+
+        criteria, _, _ = inbox_for(current_user)
+        unread_count = db.session.scalar(select(func.count(Message.id)).where(*criteria, Message.is_read.is_(False)))
+
+        serialize = serializer(Course, DASHBOARD_COURSE_FIELDS)
+        return jsonify({'courses': [serialize(course) for course in courses], 'unread_count': unread_count}), 200
+    except Exception as e:
+        return jsonify({'error': 'Failed to load dashboard', 'message': str(e)}), 500
+
+
 @app.route('/student/course/<int:course_id>', methods=['GET'])
 @token_required
+@replica_reads
 def get_student_course_details(current_user, course_id):
     try:
         # Check if the current user is a student
         if not isinstance(current_user, Student):
             return jsonify({'error': 'Unauthorized access'}), 403
 
-        # Get the course details from the database
-        course = Course.query.filter_by(id=course_id).first()
+        def build():
+            # Get the course details from the database
+            course = Course.query.filter_by(id=course_id).first()
 
-        if not course:
-            return jsonify({'error': 'Course not found'}), 404
+            if not course:
+                return None
 
-        # Get the admin details associated with the course
-        admin_email = course.admins[0].email
+            # Get the admin details associated with the course
+            admin_email = course.admins[0].email
 
-        # Serialize the course details to JSON
-        course_data = {
-            'id': course.id,
-            'title': course.title,
-            'description': course.description,
-            'thumbnail': course.thumbnail,
-            'admin_email': admin_email
-        }
+            # Serialize the course details to JSON
+            course_data = {
+                'id': course.id,
+                'title': course.title,
+                'description': course.description,
+                'thumbnail': course.thumbnail,
+                'admin_email': admin_email
+            }
+            return jsonify(course_data).get_data()
 
-        return jsonify(course_data), 200
+        response = cached_json_response(f'course:{course_id}', build)
+        if response is None:
+            return jsonify({'error': 'Course not found'}), 404
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve course details', 'message': str(e)}), 500
 
 
 @app.route('/student/course/<int:course_id>/module', methods=['GET'])
 @token_required
+@replica_reads
 def get_student_course_modules(current_user, course_id):
     try:
         # Check if the current user is a student
         if not isinstance(current_user, Student):
             return jsonify({'error': 'Unauthorized access'}), 403
 
-        # Get the modules associated with the course from the database
-        modules = Module.query.filter_by(course_id=course_id).all()
-
-        # Serialize modules data
-        modules_data = []
-        for module in modules:
-            module_data = {
-                'id': module.id,
-                'title': module.title,
-                'media': module.media,
-                'notes': module.notes
-            }
-            modules_data.append(module_data)
+        def build():
+            if db.session.scalar(select(Course.id).where(Course.id == course_id)) is None:
+                return None
+
+            # Get the modules associated with the course from the database
+            modules = (Module.query.options(only_columns(Module, MODULE_LIST_FIELDS))
+                       .filter_by(course_id=course_id).order_by(Module.position, Module.id).all())
 
-        return jsonify(modules_data), 200
+            # Serialize modules data
+            serialize = serializer(Module, MODULE_LIST_FIELDS)
+            modules_data = [serialize(module) for module in modules]
+            return jsonify(modules_data).get_data()
+
+        response = cached_json_response(f'course:{course_id}:modules', build)
+        if response is None:
+            return jsonify({'error': 'Course not found'}), 404
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': 'Failed to retrieve course modules', 'message': str(e)}), 500
 
 
 
 
+MODULE_FIELDS = ('title', 'media', 'notes', 'position')
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+# Apply a PATCH's module creates, updates and deletes with one statement each.
+# Returns (counts, error); every module id referenced must belong to `course`.
+def sync_course_modules(course, modules_data, deleted_ids):
+    if not isinstance(modules_data, list) or not all(isinstance(module, dict) for module in modules_data):
+        return None, 'modules must be a list of module objects'
+    if not isinstance(deleted_ids, list) or not all(_is_id(module_id) for module_id in deleted_ids):
+        return None, 'deleted_module_ids must be a list of module ids'
+    if not all(_is_id(module['id']) for module in modules_data if module.get('id') is not None):
+        return None, 'Module ids must be integers'
+
+    updates = [module for module in modules_data if module.get('id')]
+    creates = [module for module in modules_data if not module.get('id')]
+    referenced_ids = {module['id'] for module in updates} | set(deleted_ids)
+
+    if referenced_ids:
+        owned_ids = set(db.session.scalars(
+            select(Module.id).where(Module.id.in_(referenced_ids), Module.course_id == course.id)
+        ))
+        foreign_ids = referenced_ids - owned_ids
+        if foreign_ids:
+            return None, f'Modules {sorted(foreign_ids)} do not belong to course {course.id}'
+
+    if any(not module.get('title') or not module.get('media') for module in creates):
+        return None, 'New modules need a title and media'
+
+    update_rows = [
+        {'id': module['id'], **{field: module[field] for field in MODULE_FIELDS if field in module}}
+        for module in updates
+    ]
+    update_rows = [row for row in update_rows if len(row) > 1]
+    if update_rows:
+        db.session.execute(update(Module), update_rows)
+
+    if creates:
+        # New modules without an explicit position go after the existing ones, in payload order
+        next_position = (db.session.scalar(
+            select(func.max(Module.position)).where(Module.course_id == course.id)
+        ) or 0) + 1
+        create_rows = []
+        for module in creates:
+            row = {field: module.get(field) for field in MODULE_FIELDS}
+            if row['position'] is None:
+                row['position'] = next_position
+                next_position += 1
+            create_rows.append({**row, 'course_id': course.id})
+        db.session.execute(insert(Module), create_rows)
+
+    if deleted_ids:
+        db.session.execute(
+            delete(Module).where(Module.id.in_(deleted_ids), Module.course_id == course.id),
+            execution_options={'synchronize_session': False}
+        )
+
+    return {'created': len(creates), 'updated': len(update_rows), 'deleted': len(deleted_ids)}, None
+
+
 # Lets define route for retrieving courses belonging to a certain admin
 @app.route('/courses/admin', methods=['GET', 'POST', 'PATCH'])
 @token_required
@@ -297,30 +505,17 @@ def admin_courses(current_user):
         admin = Admin.query.filter_by(id=current_user.id).first()  # Assuming Admin model has an 'id' attribute
         if not admin:
             return jsonify({'error': 'Admin not found!'}), 404
-        print(admin.courses)
         # Get all courses associated with the logged-in admin
-        courses = Course.query.filter(Course.admin_id == admin.id).options(joinedload(Course.modules)).all()
+        courses = Course.query.filter(Course.admin_id == admin.id).options(
+            only_columns(Course, ADMIN_COURSE_FIELDS),
+            joinedload(Course.modules).options(only_columns(Module, ADMIN_MODULE_FIELDS))
+        ).all()
 
         # Serialize the courses
+        serialize_course = serializer(Course, ADMIN_COURSE_FIELDS)
+        serialize_module = serializer(Module, ADMIN_MODULE_FIELDS)
         courses_data = [
-            {
-                "id": course.id,
-                "title": course.title,
-                "description": course.description,
-                "thumbnail": course.thumbnail,
-                "price": course.price,
-                "admin_id": course.admin_id,
-                "modules": [
-                    {
-                        "id": module.id,
-                        "title": module.title,
-                        "media": module.media,
-                        "notes": module.notes,
-                        "course_id": module.course_id
-                    }
-                    for module in course.modules
-                ]
-            }
+            {**serialize_course(course), "modules": [serialize_module(module) for module in course.modules]}
             for course in courses
         ]
         
@@ -341,18 +536,19 @@ def admin_courses(current_user):
         new_course = Course(title=title, description=description, thumbnail=thumbnail, price=price, admin_id=current_user.id)
         
         # Add modules to the course
-        for module_data in data['modules']:
+        for position, module_data in enumerate(data['modules'], start=1):
             title = module_data.get('title')
             media = module_data.get('media')
             notes = module_data.get('notes')
 
             # Create a new Module object and add it to the course
-            new_module = Module(title=title, media=media, notes=notes)
+            new_module = Module(title=title, media=media, notes=notes, position=position)
             new_course.modules.append(new_module)
 
         # Add the new course to the database session
         db.session.add(new_course)
         db.session.commit()
+        catalog_cache.bump()
 
         return jsonify({'message': 'Course created successfully!', 'course_id': new_course.id}), 201
 
@@ -361,10 +557,15 @@ def admin_courses(current_user):
         if not data or not data.get('course_id'):
             return jsonify({'error': 'Incomplete update data!'}), 400
 
+        if not isinstance(current_user, Admin):
+            return jsonify({'error': 'Unauthorized'}), 403
+
         course_id = data['course_id']
         course = Course.query.get(course_id)
         if not course:
             return jsonify({'error': 'Course not found!'}), 404
+        if course.admin_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
 
         # Update course information
         if 'title' in data:
@@ -376,55 +577,151 @@ def admin_courses(current_user):
         if 'price' in data:
             course.price = data['price']
 
-        # Update modules information
-        if 'modules' in data:
-            for module_data in data['modules']:
-                module_id = module_data.get('id')
-                if module_id:
-                    module = Module.query.get(module_id)
-                    if module:
-                        if 'title' in module_data:
-                            module.title = module_data['title']
-                        if 'media' in module_data:
-                            module.media = module_data['media']
-                        if 'notes' in module_data:
-                            module.notes = module_data['notes']
+        # A new title or price needs a new Stripe Price, created on the next checkout
+        if course.stripe_price_id and ('title' in data or 'price' in data):
+            course.stripe_price_id = None
+
+        # Create, update, reorder and delete modules in bulk
+        module_counts = {'created': 0, 'updated': 0, 'deleted': 0}
+        if 'modules' in data or 'deleted_module_ids' in data:
+            module_counts, error = sync_course_modules(course, data.get('modules', []), data.get('deleted_module_ids', []))
+            if error:
+                db.session.rollback()
+                return jsonify({'error': error}), 400
 
         db.session.commit()
+        catalog_cache.bump()
 
-        return jsonify({'message': 'Course updated successfully!'}), 200
+        return jsonify({'message': 'Course updated successfully!', 'modules': module_counts}), 200
     
 
 
+IMPORT_CONTENT_TYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/json': 'json',
+    'text/csv': 'csv',
+}
+
+
+# Bulk course import from an NDJSON, JSON array or CSV file, sent as the raw body or as a multipart `file` field.
+# The file is parsed incrementally and written in batches; ?dry_run=1 only validates.
+@app.route('/courses/admin/import', methods=['POST'])
+@statement_timeout('STATEMENT_TIMEOUT_LONG_MS')
+@token_required
+def import_admin_courses(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({'error': 'No file uploaded!'}), 400
+        stream = upload.stream
+        guessed_format = upload.filename.rsplit('.', 1)[-1].lower() if upload.filename else None
+    else:
+        stream = request.stream
+        guessed_format = IMPORT_CONTENT_TYPES.get(request.mimetype)
+
+    file_format = request.args.get('format', guessed_format)
+    if file_format == 'jsonl':
+        file_format = 'ndjson'
+    if file_format not in PARSERS:
+        return jsonify({'error': 'Unsupported format, use ndjson, json or csv'}), 400
+
+    importer = CourseImporter(
+        current_user.id,
+        batch_size=app.config['IMPORT_BATCH_SIZE'],
+        dry_run=request.args.get('dry_run', '').lower() in ('1', 'true', 'yes'),
+        max_errors=app.config['IMPORT_MAX_ERRORS']
+    )
+    try:
+        report = importer.run(PARSERS[file_format](stream))
+    except Exception as e:
+        db.session.rollback()
+        # Batches already committed stay imported, so report how far we got
+        return jsonify({'error': str(e), 'courses_imported': importer.courses, 'rows': importer.rows}), 500
+    finally:
+        # Also after a failure part-way through, so the batches that did commit show up in the catalog
+        if importer.courses and not importer.dry_run:
+            catalog_cache.bump()
+
+    return jsonify(report), 200 if not importer.error_count else 207
+
+
+# Delete courses and everything hanging off them with one DELETE per table.
+# Only courses owned by `admin_id` are touched; returns the ids that were deleted.
+def delete_courses(admin_id, course_ids):
+    owned_ids = db.session.scalars(
+        select(Course.id).where(Course.id.in_(course_ids), Course.admin_id == admin_id)
+    ).all()
+    if not owned_ids:
+        return []
+
+    for table_column in (Module.__table__.c.course_id, student_courses.c.course_id, admin_courses_table.c.course_id):
+        db.session.execute(delete(table_column.table).where(table_column.in_(owned_ids)))
+    db.session.execute(delete(Course.__table__).where(Course.__table__.c.id.in_(owned_ids)))
+    return owned_ids
+
+
 #Delete Course
 @app.route('/courses/admin/<int:courseId>', methods=['DELETE'])
 @token_required
 def delete_admin_course(current_user, courseId):
     # Check if the current user has permission to delete the course
-    if not current_user.id:
+    if not isinstance(current_user, Admin):
         return jsonify({'error': 'Unauthorized'}), 403
     
     # Fetch the course using the courseId from the URL path parameter.
     course = Course.query.get(courseId)
     if not course:
         return jsonify({'error': 'Course not found!'}), 404
+    if course.admin_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
 
 
     try:
-        # Delete associated modules first
-        for module in course.modules:
-            db.session.delete(module)
-
-        # Delete the course and commit the transaction.
-        db.session.delete(course)
+        # Delete the course with its modules, enrollments and admin links in one transaction
+        delete_courses(current_user.id, [courseId])
         db.session.commit()
+        catalog_cache.bump()
 
         return jsonify({'message': 'Course and associated modules deleted successfully!'}), 200
-    except Exception as e:
+    except Exception:
         db.session.rollback()
         return jsonify({'error': 'An error occurred while deleting the course and associated modules.'}), 500
 
 
+# Delete many of the current admin's courses in one transaction
+@app.route('/courses/admin/bulk-delete', methods=['POST'])
+@statement_timeout('STATEMENT_TIMEOUT_LONG_MS')
+@token_required
+def bulk_delete_admin_courses(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json()
+    course_ids = data.get('course_ids') if data else None
+    if not isinstance(course_ids, list) or not course_ids or not all(isinstance(i, int) for i in course_ids):
+        return jsonify({'error': 'course_ids must be a non-empty list of course ids!'}), 400
+
+    try:
+        deleted_ids = delete_courses(current_user.id, course_ids)
+        db.session.commit()
+        if deleted_ids:
+            catalog_cache.bump()
+
+        return jsonify({
+            'message': 'Courses deleted successfully!',
+            'deleted': len(deleted_ids),
+            'not_deleted': sorted(set(course_ids) - set(deleted_ids))
+        }), 200
+    except Exception:
+        db.session.rollback()
+        return jsonify({'error': 'An error occurred while deleting the courses.'}), 500
+
+
+
 
 
 
@@ -481,10 +778,11 @@ def send_message_to_admin(current_user):
             return jsonify({'message': 'Invalid admin ID'}), 400
 
         # Create a new message object
-        message = Message(title=title, content=content, sender_id=current_user.id, receiver_id=admin_id)
+        message = Message(title=title, content=content, sender_id=current_user.id, admin_receiver_id=admin_id)
 
-        # Add the message to the database session
+        # Add the message to the database session and wake the admin's open inbox streams
         db.session.add(message)
+        inbox_notifier.publish(inbox_key('admin', admin.id))
         db.session.commit()
 
         return jsonify({'message': 'Message sent successfully'}), 201
@@ -500,11 +798,12 @@ def get_admins(current_user):
         # Get email substring from query parameter
         email = request.args.get('email', '')
 
-        # Query database for admins whose email matches the substring
-        matching_admins = Admin.query.filter(Admin.email.like(f'%{email}%')).all()
+        # Ranked, size-capped search for admins whose email matches the substring
+        matching_admins = search_emails(Admin, email)
 
         # Serialize the matching admins
-        serialized_admins = [{'id': admin.id, 'email': admin.email} for admin in matching_admins]
+        serialize = serializer(Admin, EMAIL_FIELDS)
+        serialized_admins = [serialize(admin) for admin in matching_admins]
 
         # Return the serialized admins as JSON response
         return jsonify({'admins': serialized_admins}), 200
@@ -520,11 +819,12 @@ def get_students_by_email_substring(current_user):
         # Get email substring from query parameter
         email = request.args.get('email', '')
 
-        # Query database for students whose email matches the substring
-        matching_students = Student.query.filter(Student.email.like(f'%{email}%')).all()
+        # Ranked, size-capped search for students whose email matches the substring
+        matching_students = search_emails(Student, email)
 
         # Serialize the matching students
-        serialized_students = [{'id': student.id, 'email': student.email} for student in matching_students]
+        serialize = serializer(Student, EMAIL_FIELDS)
+        serialized_students = [serialize(student) for student in matching_students]
 
         # Return the serialized students as JSON response
         return jsonify({'students': serialized_students}), 200
@@ -533,37 +833,72 @@ def get_students_by_email_substring(current_user):
     
 
 
+def serialize_student_inbox_message(message):
+    return {
+        'id': message.id,
+        'title': message.title,
+        'content': message.content,
+        'is_read': message.is_read,
+        'sender_id': message.admin_sender.id if message.admin_sender else None,
+        'sender_email': message.admin_sender.email if message.admin_sender else None
+    }
+
+
+def serialize_admin_inbox_message(message):
+    return {
+        'id': message.id,
+        'title': message.title,
+        'content': message.content,
+        'is_read': message.is_read,
+        'sender_name': message.sender.username if message.sender else "Unknown"
+    }
+
+
+# The filter, eager-loaded sender and serializer behind the current user's inbox
+def inbox_for(current_user):
+    if isinstance(current_user, Student):
+        criteria = [Message.receiver_id == current_user.id, Message.admin_sender_id.isnot(None)]
+        return criteria, Message.admin_sender, serialize_student_inbox_message
+    return [Message.admin_receiver_id == current_user.id], Message.sender, serialize_admin_inbox_message
+
+
+# Fetch one keyset page of an inbox, newest first, with `sender` eager-loaded in the same query
+def inbox_page(criteria, sender):
+    cursor, limit = keyset_page_args(app.config['INBOX_PAGE_SIZE'], app.config['INBOX_PAGE_SIZE_MAX'])
+    if limit is None:
+        return None, None, None
+
+    query = Message.query.filter(*criteria).options(joinedload(sender))
+    if cursor is not None:
+        query = query.filter(Message.id < cursor)
+    messages = query.order_by(Message.id.desc()).limit(limit + 1).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+
+    unread_count = db.session.query(func.count(Message.id)).filter(*criteria, Message.is_read.is_(False)).scalar()
+    return messages, messages[-1].id if has_more else None, unread_count
+
+
 #Will display @ Inbox all the messeges for this Student
 @app.route('/messages/from-admin', methods=['GET'])
 @token_required
+@replica_reads
 def messages_from_admin(current_user):
     try:
         # Ensure the current_user is a student
         if not isinstance(current_user, Student):
             return jsonify({'error': 'Unauthorized access'}), 403
 
-        # Fetch all messages sent by admins to the current user (student)
-        messages = Message.query.filter(
-            and_(
-                Message.receiver_id == current_user.id,
-                Message.admin_sender_id.isnot(None)
-            )
-        ).all()
-
-        if not messages:
-            print(f'No messages found for student ID {current_user.id} from admins.')
-
+        # Fetch a page of messages sent by admins to the current user (student)
+        criteria, sender, serialize = inbox_for(current_user)
+        messages, next_cursor, unread_count = inbox_page(criteria, sender)
+        if messages is None:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
 
         # Serialize messages
-        messages_data = [{
-            'id': message.id,
-            'title': message.title,
-            'content': message.content,
-            'sender_id': message.admin_sender.id if message.admin_sender else None,
-            'sender_email': message.admin_sender.email if message.admin_sender else None
-        } for message in messages]
+        messages_data = [serialize(message) for message in messages]
 
-        return jsonify({'messages': messages_data}), 200
+        return jsonify({'messages': messages_data, 'next_cursor': next_cursor, 'unread_count': unread_count}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -576,24 +911,23 @@ def messages_from_admin(current_user):
 #Messages in the Inbox of Admin
 @app.route('/messages/admin', methods=['GET', 'POST'])
 @token_required
+@replica_reads
 def admin_messages(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
     if request.method == 'GET':
         try:
-            # Retrieve all messages sent to the logged-in Admin
-            admin_received_messages = current_user.received_messages
-            
+            # Retrieve a page of messages sent to the logged-in Admin
+            criteria, sender, serialize = inbox_for(current_user)
+            messages, next_cursor, unread_count = inbox_page(criteria, sender)
+            if messages is None:
+                return jsonify({'error': 'limit must be a positive integer'}), 400
+
             # Format message data
-            messages_data = []
-            for message in admin_received_messages:
-                sender_name = message.sender.username if message.sender else "Unknown"
-                messages_data.append({
-                    'id': message.id,
-                    'title': message.title,
-                    'content': message.content,                    
-                    'sender_name': sender_name
-                })
-
-            return jsonify({'messages': messages_data}), 200
+            messages_data = [serialize(message) for message in messages]
+
+            return jsonify({'messages': messages_data, 'next_cursor': next_cursor, 'unread_count': unread_count}), 200
         except Exception as e:
             return jsonify({'error': 'Failed to retrieve admin messages: ' + str(e)}), 500
 
@@ -616,6 +950,7 @@ def admin_messages(current_user):
                 receiver_id=student.id
             )
             db.session.add(new_message)
+            inbox_notifier.publish(inbox_key('student', student.id))
             db.session.commit()
 
             return jsonify({'message': 'Message created successfully!', 'message_id': new_message.id}), 201
@@ -625,6 +960,116 @@ def admin_messages(current_user):
 
 
 
+# Send one message to every student enrolled in one of the admin's courses, as a single INSERT ... SELECT
+@app.route('/courses/admin/<int:course_id>/broadcast', methods=['POST'])
+@statement_timeout('STATEMENT_TIMEOUT_LONG_MS')
+@token_required
+def broadcast_course_message(current_user, course_id):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    data = request.get_json()
+    if not data or not data.get('title') or not data.get('content'):
+        return jsonify({'error': 'Incomplete message data!'}), 400
+
+    course = Course.query.filter_by(id=course_id, admin_id=current_user.id).first()
+    if not course:
+        return jsonify({'error': 'Course not found!'}), 404
+
+    try:
+        enrolled = select(
+            literal(data['title']),
+            literal(data['content']),
+            literal(current_user.id),
+            student_courses.c.student_id
+        ).where(student_courses.c.course_id == course_id)
+        result = db.session.execute(
+            insert(Message)
+            .from_select(['title', 'content', 'admin_sender_id', 'receiver_id'], enrolled)
+            .returning(Message.receiver_id)
+        )
+        receiver_ids = result.scalars().all()
+        inbox_notifier.publish_many(inbox_key('student', student_id) for student_id in receiver_ids)
+        db.session.commit()
+
+        return jsonify({'message': 'Broadcast sent successfully!', 'course_id': course_id, 'delivered': len(receiver_ids)}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+# Server-Sent Events stream of new inbox messages for the current user.
+# Resumes after the Last-Event-ID header (or ?last_id=) and ends after SSE_MAX_DURATION; EventSource reconnects on its own.
+# Caps open /messages/stream connections in this worker
+stream_slots = threading.BoundedSemaphore(app.config['SSE_MAX_STREAMS']) if app.config['SSE_MAX_STREAMS'] else None
+
+
+@app.route('/messages/stream', methods=['GET'])
+@token_required
+def stream_messages(current_user):
+    user_type = 'student' if isinstance(current_user, Student) else 'admin'
+    key = inbox_key(user_type, current_user.id)
+    criteria, sender, serialize = inbox_for(current_user)
+    last_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('last_id', 0, type=int)
+    batch_size = app.config['INBOX_PAGE_SIZE_MAX']
+    wait_timeout = app.config['SSE_KEEPALIVE'] if inbox_notifier.cross_worker else app.config['SSE_POLL_INTERVAL']
+
+    def events():
+        nonlocal last_id
+        deadline = time.monotonic() + app.config['SSE_MAX_DURATION']
+        last_sent = time.monotonic()
+        seen = inbox_notifier.version(key)
+        yield f"retry: {int(app.config['SSE_POLL_INTERVAL'] * 1000)}\n\n"
+
+        while time.monotonic() < deadline:
+            messages = Message.query.filter(*criteria, Message.id > last_id) \
+                .options(joinedload(sender)).order_by(Message.id).limit(batch_size).all()
+            payloads = [(message.id, serialize(message)) for message in messages]
+            # Hand the connection back to the pool before waiting
+            db.session.rollback()
+
+            for message_id, data in payloads:
+                yield f"id: {message_id}\nevent: message\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+                last_id = message_id
+                last_sent = time.monotonic()
+            if len(payloads) == batch_size:
+                continue
+
+            seen = inbox_notifier.wait(key, seen, wait_timeout)
+            if time.monotonic() - last_sent >= app.config['SSE_KEEPALIVE']:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+
+    if stream_slots and not stream_slots.acquire(blocking=False):
+        inbox = '/messages/from-admin' if user_type == 'student' else '/messages/admin'
+        response = make_response({'error': f'Too many open streams, poll {inbox} instead'}, 503)
+        response.headers['Retry-After'] = str(int(app.config['SSE_POLL_INTERVAL']) or 1)
+        return response
+
+    response = app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    if stream_slots:
+        response.call_on_close(stream_slots.release)
+    return response
+
+
+# Mark a message in the current user's inbox as read
+@app.route('/messages/<int:message_id>/read', methods=['PATCH'])
+@token_required
+def mark_message_read(current_user, message_id):
+    if isinstance(current_user, Student):
+        owner = Message.receiver_id == current_user.id
+    else:
+        owner = Message.admin_receiver_id == current_user.id
+
+    updated = Message.query.filter(Message.id == message_id, owner).update({'is_read': True})
+    db.session.commit()
+    if not updated:
+        return jsonify({'error': 'Message not found'}), 404
+    return jsonify({'message': 'Message marked as read'}), 200
+
+
 @app.route('/checkout/<int:course_id>', methods=['GET'])
 @token_required
 def checkout(current_user, course_id):
@@ -633,67 +1078,61 @@ def checkout(current_user, course_id):
     if not course:
         return jsonify({'error': 'Course not found'}), 404
 
-    # Calculate the unit_amount, ensuring it meets the minimum requirements
-    unit_amount = max(int(course.price * 100), 50)
+    # Enrollment happens once Stripe confirms payment (see stripe_webhook), so only refuse repeat purchases here
+    already_enrolled = db.session.scalar(
+        select(student_courses.c.student_id)
+        .where(student_courses.c.student_id == current_user.id, student_courses.c.course_id == course.id)
+    )
+    if already_enrolled:
+        return jsonify({'error': 'Student already enrolled in this course'}), 400
 
     try:
-        # Create a Stripe checkout session
-        session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[{
-                'price_data': {
-                    'currency': 'usd',
-                    'product_data': {
-                        'name': course.title,
-                    },
-                    'unit_amount': unit_amount,
-                },
-                'quantity': 1,
-            }],
-            mode='payment',    
+        # Create a Stripe checkout session against the course's stored Price
+        session = create_checkout_session(
+            current_user,
+            course,
             # success_url=url_for('success', _external=True),
             # success_url=f'http://localhost:3000/success?course_title={course.title}&course_price={course.price}',
             success_url=f'http://localhost:3000/success?course_id={course_id}&course_title={course.title}&course_price={course.price}',
             cancel_url=url_for('cancel', _external=True),
         )
 
-        current_user.courses.append(course)
-        db.session.commit()
-
         return jsonify({'checkout_url': session.url}), 200
-    except IntegrityError as e:
-        db.session.rollback()  # Rollback the transaction
-        return jsonify({'error': 'Student already enrolled in this course'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-# Function to generate PDF receipt
-def generate_receipt(current_user, course_title, course_price):
-    # Create a PDF file
-    pdf_buffer = io.BytesIO()
-    p = canvas.Canvas(pdf_buffer, pagesize=letter)
+# Stripe calls this when a checkout completes; paid sessions are queued and enrolled by the enrollment writer
+@app.route('/stripe/webhook', methods=['POST'])
+def stripe_webhook():
+    if not app.config['STRIPE_WEBHOOK_SECRET']:
+        return jsonify({'error': 'Webhook secret not configured'}), 503
 
-    # Insert logo thumbnail (assuming logo_image is the path to your logo image)
-    p.drawImage("logo.png", 100, 800, width=100, height=100)
+    payload = request.get_data(as_text=True)
+    try:
+        # The tolerance rejects signatures older than five minutes, so a captured event can't be replayed later
+        stripe.WebhookSignature.verify_header(
+            payload, request.headers.get('Stripe-Signature', ''), app.config['STRIPE_WEBHOOK_SECRET'],
+            tolerance=stripe.Webhook.DEFAULT_TOLERANCE
+        )
+        event = json.loads(payload)
+    except (ValueError, stripe.SignatureVerificationError):
+        return jsonify({'error': 'Invalid signature'}), 400
 
-    # Draw other text
-    p.drawString(100, 750, "Moringa School")
-    p.drawString(100, 730, "Thank you for enrolling in our course.")
-    p.drawString(100, 710, f"Student Name: {current_user.username}")
-    p.drawString(100, 690, f"Email: {current_user.email}")
-    p.drawString(100, 670, f"Course Title: {course_title}")
-    p.drawString(100, 650, f"Course Price: ${course_price}")
+    if event['type'] in ('checkout.session.completed', 'checkout.session.async_payment_succeeded'):
+        session = event['data']['object']
+        metadata = session.get('metadata') or {}
+        if session.get('payment_status') == 'paid' and metadata.get('student_id') and metadata.get('course_id'):
+            enqueue_enrollment(event['id'], int(metadata['student_id']), int(metadata['course_id']))
+            enrollment_writer.wake()
 
-    # Add date and time
-    purchase_datetime = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    p.drawString(100, 100, f"Purchase Date: {purchase_datetime}")
+    return jsonify({'received': True}), 200
 
-    # Save and return PDF buffer
-    p.showPage()
-    p.save()
-    pdf_buffer.seek(0)
-    return pdf_buffer
+
+# Function to generate PDF receipt (the logo is encoded once per worker, see receipts.py)
+def generate_receipt(current_user, course_title, course_price, purchased_at):
+    pdf = receipt_template.render(current_user.username, current_user.email, course_title, course_price, purchased_at)
+    return io.BytesIO(pdf)
 
 
 @app.route('/success')
@@ -701,10 +1140,28 @@ def generate_receipt(current_user, course_title, course_price):
 def success(current_user):
     course_title = request.args.get('course_title')
     course_price = request.args.get('course_price')
-    course_id = request.args.get('course_id') 
-
-    # Generate PDF receipt
-    pdf_buffer = generate_receipt(current_user, course_title, course_price)
+    course_id = request.args.get('course_id', type=int)
+
+    # Prefer the stored course details over the query string when we know the course
+    course = db.session.get(Course, course_id) if course_id else None
+    if course:
+        course_title, course_price = course.title, course.price
+
+    # Date the receipt with the enrollment. Until the enrollment writer has recorded it the purchase is happening
+    # now; an enrollment from before dates were recorded prints as unknown.
+    enrollment = db.session.execute(
+        select(student_courses.c.enrolled_at)
+        .where(student_courses.c.student_id == current_user.id, student_courses.c.course_id == course.id)
+    ).first() if course else None
+    purchased_at = enrollment.enrolled_at if enrollment else datetime.datetime.now()
+
+    # Generate PDF receipt, reusing this worker's copy for repeat downloads of the same enrollment
+    if enrollment:
+        cache_key = (current_user.id, course.id, current_user.username, current_user.email, course_title, course_price, purchased_at)
+        pdf = receipt_cache.get_or_render(cache_key, lambda: generate_receipt(current_user, course_title, course_price, purchased_at).getvalue())
+        pdf_buffer = io.BytesIO(pdf)
+    else:
+        pdf_buffer = generate_receipt(current_user, course_title, course_price, purchased_at)
 
     # Create response with PDF attachment
     response = make_response(send_file(pdf_buffer, as_attachment=True, download_name='course_receipt.pdf', mimetype='application/pdf'))
@@ -715,6 +1172,89 @@ def success(current_user):
 
 
 
+# Every receipt for the admin's courses as one ZIP, filtered by ?course_id= and/or ?start=/&end= (YYYY-MM-DD, inclusive).
+# Receipts render in a process pool and are streamed into the archive as each finishes.
+@app.route('/receipts/export', methods=['GET'])
+@statement_timeout('STATEMENT_TIMEOUT_LONG_MS')
+@token_required
+def export_receipts(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+
+    course_id = request.args.get('course_id', type=int)
+    try:
+        start = datetime.date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    if not course_id and not start and not end:
+        return jsonify({'error': 'Provide a course_id or a date range'}), 400
+
+    query = select(
+        Student.id, Student.username, Student.email,
+        Course.id, Course.title, Course.price,
+        student_courses.c.enrolled_at
+    ).join(student_courses, student_courses.c.student_id == Student.id) \
+        .join(Course, Course.id == student_courses.c.course_id) \
+        .where(Course.admin_id == current_user.id)
+    if course_id:
+        query = query.where(Course.id == course_id)
+    # Enrollments with an unknown (NULL) date never fall inside a date range; a course-only export includes them
+    if start:
+        query = query.where(student_courses.c.enrolled_at >= start)
+    if end:
+        query = query.where(student_courses.c.enrolled_at < end + datetime.timedelta(days=1))
+    query = query.order_by(student_courses.c.course_id, student_courses.c.student_id)
+
+    def jobs():
+        rows = db.session.execute(query.execution_options(stream_results=True, yield_per=500))
+        for student_id, username, email, row_course_id, title, price, enrolled_at in rows:
+            yield f'course-{row_course_id}/receipt-{student_id}.pdf', (username, email, title, price, enrolled_at)
+
+    workers = app.config['RECEIPT_EXPORT_WORKERS']
+    archive = stream_receipt_zip(jobs(), get_export_pool(workers), window=workers * 4)
+    response = app.response_class(stream_with_context(archive), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=receipts.zip'
+    return response
+
+
+# Hit rate of the per-worker principal cache used by token_required
+@app.route('/stats/principals', methods=['GET'])
+@token_required
+def principal_cache_stats(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+    return jsonify(principal_cache.stats()), 200
+
+
+# Hit/miss/rebuild counters of this worker's catalog response cache
+@app.route('/stats/catalog-cache', methods=['GET'])
+@token_required
+def catalog_cache_stats(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+    return jsonify({**catalog_cache.stats(), 'compressed': compressed_cache.stats()}), 200
+
+
+# Connection pool counters for the worker that answers (each gunicorn worker has its own pool)
+@app.route('/stats/db-pool', methods=['GET'])
+@token_required
+def db_pool_stats(current_user):
+    if not isinstance(current_user, Admin):
+        return jsonify({'error': 'Unauthorized access'}), 403
+    return jsonify({**pool_metrics.snapshot(db.engine.pool), 'replica': replica_router.stats()}), 200
+
+
+# Prometheus scrape endpoint, summed over every gunicorn worker on this host
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized access'}), 403
+    counters, histograms = metrics_registry.collect()
+    return app.response_class(render_prometheus(counters, histograms), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/cancel')
 def cancel():
     return jsonify({"message": "Purchase canceled"})
@@ -0,0 +1,221 @@
+# Concurrent capacity of one gunicorn worker on GET /checkout/<id>, where almost all the time is spent waiting on Stripe.
+# Starts the Stripe stub with a fixed latency, then for each worker class runs a single worker and drives it at
+# increasing numbers of requests in flight, each as a different student.
+#
+#   python benchmarks/concurrency.py --worker-class gthread gevent --levels 16 64 256 1024 --latency-ms 200
+#
+# effective_concurrency is throughput x Stripe latency: how many checkouts the worker really had waiting on Stripe
+# at once. A gthread worker tops out at its thread count; a gevent worker keeps climbing up to the DB pool and
+# worker_connections. Set --database-url to run against Postgres instead of a throwaway SQLite file.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# Runs in a child process with the benchmark's DATABASE_URL: one course with a Stripe Price already recorded,
+# and `students` students with tokens minted directly so no bcrypt work happens during the run
+def seed(args):
+    sys.path.insert(0, ROOT)
+    import datetime
+
+    import jwt
+    from sqlalchemy import insert, select
+
+    from app import app, db
+    from models import Admin, Course, Student
+
+    with app.app_context():
+        db.create_all()
+        admin = Admin(email="bench-admin@example.com", _password="unused")
+        db.session.add(admin)
+        db.session.flush()
+        course = Course(title="Benchmark course", description="Benchmark course", price=10.0, admin_id=admin.id,
+                        stripe_product_id="prod_bench", stripe_price_id="price_bench")
+        db.session.add(course)
+        db.session.execute(insert(Student), [
+            {"email": f"bench{i}@example.com", "username": f"bench{i}", "_password": "unused"}
+            for i in range(args.students)
+        ])
+        db.session.commit()
+        student_ids = db.session.scalars(select(Student.id)).all()
+        exp = datetime.datetime.now() + datetime.timedelta(hours=2)
+        tokens = [
+            jwt.encode({"id": student_id, "user_type": "student", "exp": exp}, app.config["SECRET_KEY"], algorithm="HS256")
+            for student_id in student_ids
+        ]
+        print(json.dumps({"course_id": course.id, "tokens": tokens}))
+
+
+async def fetch(port, path, token, timeout):
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\njwttoken: {token}\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        status = int(status_line.split()[1])
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        status = None
+    return status, time.perf_counter() - started
+
+
+async def run_level(port, path, tokens, concurrency, total, timeout):
+    tokens = iter(tokens)
+    latencies, statuses = [], {}
+
+    async def client():
+        for token in tokens:
+            status, elapsed = await fetch(port, path, token, timeout)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed, total
+
+
+# The master accepts connections before the worker has imported the app, so wait for a real response
+def wait_for_server(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        status, _ = asyncio.run(fetch(port, "/cancel", "", 5))
+        if status == 200:
+            return
+        time.sleep(0.2)
+    raise RuntimeError("server did not start answering")
+
+
+def run_worker_class(args, worker_class, database_url, stripe_base, tmp):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "CATALOG_CACHE_DIR": os.path.join(tmp, f"catalog-{worker_class}"),
+        "STRIPE_API_BASE": stripe_base,
+        "STRIPE_MAX_RETRIES": "0",
+        "STRIPE_READ_TIMEOUT": str(args.timeout),
+        "WEB_CONCURRENCY": "1",
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "GUNICORN_THREADS": str(args.threads),
+        "GUNICORN_WORKER_CONNECTIONS": str(args.worker_connections),
+        "DB_POOL_SIZE": str(args.db_pool_size),
+        "DB_MAX_OVERFLOW": "0",
+    })
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+         "--timeout", str(args.timeout * 2), "--graceful-timeout", "5", "--log-level", "warning", "app:app"],
+        cwd=ROOT, env=env,
+    )
+    results = []
+    try:
+        wait_for_server(port, process)
+        tokens = args.tokens
+        offset = 0
+        for concurrency in args.levels:
+            total = concurrency * args.rounds
+            batch = [tokens[(offset + i) % len(tokens)] for i in range(total)]
+            offset += total
+            latencies, statuses, elapsed, total = asyncio.run(
+                run_level(port, f"/checkout/{args.course_id}", batch, concurrency, total, args.timeout)
+            )
+            throughput = len(latencies) / elapsed if elapsed else 0.0
+            results.append({
+                "worker_class": worker_class,
+                "in_flight": concurrency,
+                "requests": total,
+                "statuses": statuses,
+                "throughput_rps": round(throughput, 1),
+                "effective_concurrency": round(throughput * args.latency_ms / 1000, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            })
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--worker-class", nargs="+", default=["gthread", "gevent"])
+    parser.add_argument("--levels", nargs="+", type=int, default=[16, 64, 256, 1024])
+    parser.add_argument("--rounds", type=int, default=3, help="requests per client at each level")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--worker-connections", type=int, default=1000)
+    parser.add_argument("--db-pool-size", type=int, default=10)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--timeout", type=int, default=60)
+    parser.add_argument("--database-url")
+    parser.add_argument("--seed", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, CATALOG_CACHE_DIR=os.path.join(tmp, "catalog-seed"))
+        output = subprocess.run(
+            [sys.executable, __file__, "--seed", "--students", str(args.students)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        seeded = json.loads(output.strip().splitlines()[-1])
+        args.course_id, args.tokens = seeded["course_id"], seeded["tokens"]
+
+        # The stub gets its own process so it doesn't compete with the load generator for the GIL
+        stripe_port = free_port()
+        stripe_stub = subprocess.Popen([
+            sys.executable, os.path.join(ROOT, "benchmarks", "stripe_stub.py"),
+            "--port", str(stripe_port), "--latency-ms", str(args.latency_ms),
+        ], stdout=subprocess.DEVNULL)
+
+        results = []
+        try:
+            for worker_class in args.worker_class:
+                results.extend(run_worker_class(args, worker_class, database_url, f"http://127.0.0.1:{stripe_port}", tmp))
+        finally:
+            stripe_stub.terminate()
+            stripe_stub.wait(timeout=30)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Throughput of POST /courses/admin/import on a throwaway SQLite database.
+#
+#   python benchmarks/course_import.py --courses 50000 --modules 5 --format ndjson
+#
+# The import file is written to disk first and streamed to the endpoint, so peak RSS reflects the importer,
+# not the test data.
+
+import argparse
+import csv
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_ndjson(path, courses, modules):
+    with open(path, "w") as f:
+        for i in range(courses):
+            f.write(json.dumps({
+                "title": f"Imported course {i}",
+                "description": "Partner catalog course " * 5,
+                "price": 10 + i % 90,
+                "modules": [{"title": f"Module {m}", "media": f"https://example.com/{i}/{m}", "notes": "Notes " * 20}
+                            for m in range(modules)],
+            }) + "\n")
+
+
+def write_csv(path, courses, modules):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "description", "thumbnail", "price", "module_title", "module_media", "module_notes"])
+        for i in range(courses):
+            for m in range(max(modules, 1)):
+                writer.writerow([f"Imported course {i}", "Partner catalog course " * 5, "", 10 + i % 90,
+                                 f"Module {m}" if modules else "", f"https://example.com/{i}/{m}" if modules else "",
+                                 "Notes " * 20])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--modules", type=int, default=5)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+    os.environ.setdefault("CATALOG_CACHE_DIR", os.path.join(tmp, "catalog_cache"))
+    os.environ.setdefault("PASSWORD_POOL_WORKERS", "0")
+    sys.path.insert(0, ROOT)
+    import jwt
+    from app import app, db
+    from models import Admin
+
+    with app.app_context():
+        db.create_all()
+        admin = Admin(email="importer@example.com", _password="unused")
+        db.session.add(admin)
+        db.session.commit()
+        token = jwt.encode({"id": admin.id, "user_type": "admin", "exp": time.time() + 3600},
+                           app.config["SECRET_KEY"], algorithm="HS256")
+
+    path = os.path.join(tmp, f"catalog.{args.format}")
+    (write_ndjson if args.format == "ndjson" else write_csv)(path, args.courses, args.modules)
+    content_type = "application/x-ndjson" if args.format == "ndjson" else "text/csv"
+
+    client = app.test_client()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = client.post(f"/courses/admin/import{'?dry_run=1' if args.dry_run else ''}", data=f,
+                               headers={"jwttoken": token, "Content-Type": content_type})
+    elapsed = time.perf_counter() - started
+
+    report = response.get_json()
+    report.pop("errors", None)
+    print(json.dumps({
+        "format": args.format,
+        "file_mb": round(os.path.getsize(path) / 1e6, 1),
+        "wall_seconds": round(elapsed, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        **report,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
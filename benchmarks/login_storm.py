@@ -0,0 +1,115 @@
+# Measures GET /course latency while a burst of student logins is in flight.
+# Runs once with bcrypt inline and once on the bounded password pool, then prints both.
+#
+#   python benchmarks/login_storm.py --logins 200 --threads 8
+#
+# Requests are served by a fixed set of threads, the same way a gunicorn gthread worker would,
+# so a login holding a thread shows up as queueing time for the catalog reads behind it.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_mode(args):
+    sys.path.insert(0, ROOT)
+    from app import app, db
+    from models import Student, Course, Admin
+
+    with app.app_context():
+        db.create_all()
+        admin = Admin(email="bench-admin@example.com")
+        admin.password_hash = "bench"
+        db.session.add(admin)
+        db.session.flush()
+        student = Student(email="bench@example.com", username="bench")
+        student.password_hash = "bench"
+        db.session.add(student)
+        db.session.add_all([
+            Course(title=f"Course {i}", description="Benchmark course", price=10.0, admin_id=admin.id)
+            for i in range(args.courses)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    course_latencies = []
+    login_statuses = {}
+
+    def timed(path, submitted):
+        response = client.get(path)
+        course_latencies.append(time.perf_counter() - submitted)
+        return response.status_code
+
+    def login():
+        response = client.post("/student/login", json={"email": "bench@example.com", "password": "bench"})
+        login_statuses[response.status_code] = login_statuses.get(response.status_code, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=args.threads) as workers:
+        for _ in range(args.logins):
+            workers.submit(login)
+        for _ in range(args.reads):
+            workers.submit(timed, "/course", time.perf_counter())
+            time.sleep(args.read_interval)
+
+    return {
+        "mode": args.mode,
+        "course_requests": len(course_latencies),
+        "course_p50_ms": round(percentile(course_latencies, 50) * 1000, 2),
+        "course_p99_ms": round(percentile(course_latencies, 99) * 1000, 2),
+        "login_statuses": login_statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--read-interval", type=float, default=0.01)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--courses", type=int, default=50)
+    # Unset: the app's defaults for a gunicorn worker with --threads threads
+    parser.add_argument("--pool-workers", type=int)
+    parser.add_argument("--pool-queue", type=int)
+    parser.add_argument("--mode", choices=["inline", "pooled"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = []
+    for mode in ("inline", "pooled"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            env["GUNICORN_THREADS"] = str(args.threads)
+            if mode == "inline":
+                env["PASSWORD_POOL_WORKERS"] = "0"
+            elif args.pool_workers is not None:
+                env["PASSWORD_POOL_WORKERS"] = str(args.pool_workers)
+            if args.pool_queue is not None:
+                env["PASSWORD_POOL_QUEUE"] = str(args.pool_queue)
+            command = [sys.executable, __file__, "--mode", mode] + sys.argv[1:]
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
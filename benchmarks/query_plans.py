@@ -0,0 +1,220 @@
+# EXPLAIN audit of the SQL each route in app.py runs, against a seeded database.
+#
+#   python benchmarks/query_plans.py --output plans.json
+#   python benchmarks/query_plans.py --database-url postgresql+psycopg2://localhost/perf_copy
+#
+# Migrates the database to head, seeds it with the bulk mode of seeds.py if it is empty and refreshes planner
+# statistics. It then calls every route once through the test client with a cold catalog cache, records each statement
+# the route runs, and EXPLAINs every distinct statement (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on
+# Postgres). Exits with status 1 when a statement scans a whole table of at least --min-rows rows, unless the scan is
+# listed in ALLOWED_SCANS. The routes write, so only point --database-url at a disposable copy.
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+
+import stripe_stub
+from suite import BENCH_PASSWORD, WEBHOOK_SECRET, sample_users, stripe_signature
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (route, table) pairs whose full scans are intended, each with a comment saying why
+ALLOWED_SCANS = set()
+
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\b.*\bSELECT\b)", re.IGNORECASE | re.DOTALL)
+# "SCAN messages", "SCAN messages AS messages_1" or a walk of a whole index ("SCAN messages USING COVERING INDEX ...");
+# SEARCH lines and virtual tables (the FTS email search) are not full scans
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+
+
+def route_requests(users):
+    student, admin = users["students"][0], users["admins"][0]
+    course_ids = admin["course_ids"] or users["course_ids"][:1]
+    course_id = course_ids[0]
+    enrolled = student["enrolled"][0] if student["enrolled"] else course_id
+    not_enrolled = next(c for c in users["course_ids"] if c not in student["enrolled"])
+    message_id = student["message_ids"][0] if student["message_ids"] else 0
+    course = {"title": "Audit course", "description": "Audit", "price": 10,
+              "modules": [{"title": "Module", "media": "https://example.com/m", "notes": "Notes"}]}
+
+    webhook = json.dumps({
+        "id": "evt_audit", "type": "checkout.session.completed",
+        "data": {"object": {"payment_status": "paid",
+                            "metadata": {"student_id": str(student["id"]), "course_id": str(not_enrolled)}}},
+    })
+
+    # (method, rule, path, user, JSON body or raw bytes, extra headers)
+    return [
+        ("GET", "/course", "/course", student, None),
+        ("GET", "/course", f"/course?cursor={users['course_ids'][len(users['course_ids']) // 2]}", student, None),
+        ("POST", "/student/login", "/student/login", None, {"email": student["email"], "password": "wrong"}),
+        ("POST", "/admin/login", "/admin/login", None, {"email": admin["email"], "password": "wrong"}),
+        ("POST", "/signup/student", "/signup/student", None,
+         {"email": "audit-student@example.com", "username": "audit-student", "password": "audit"}),
+        ("POST", "/signup/admin", "/signup/admin", None, {"email": "audit-admin@example.com", "password": "audit"}),
+        ("GET", "/profile/student", "/profile/student", student, None),
+        ("POST", "/profile/student", "/profile/student", student, {"username": f"{student['username']}-audit"}),
+        ("GET", "/profile/admin", "/profile/admin", admin, None),
+        ("GET", "/courses/student", "/courses/student", student, None),
+        ("GET", "/student/dashboard", "/student/dashboard", student, None),
+        ("GET", "/student/course/<int:course_id>", f"/student/course/{course_id}", student, None),
+        ("GET", "/student/course/<int:course_id>/module", f"/student/course/{course_id}/module", student, None),
+        ("GET", "/courses/admin", "/courses/admin", admin, None),
+        ("POST", "/courses/admin", "/courses/admin", admin, course),
+        ("PATCH", "/courses/admin", "/courses/admin", admin, {"course_id": course_id, "title": "Audited course"}),
+        ("POST", "/messages/student", "/messages/student", student, {"title": "Hi", "content": "Hello", "admin_id": admin["id"]}),
+        ("GET", "/admins", f"/admins?email={admin['email'][:4]}", student, None),
+        ("GET", "/studentsmail", f"/studentsmail?email={student['email'][:4]}", admin, None),
+        ("GET", "/messages/from-admin", "/messages/from-admin", student, None),
+        ("GET", "/messages/admin", "/messages/admin", admin, None),
+        ("POST", "/messages/admin", "/messages/admin", admin, {"title": "Hi", "content": "Hello", "email": student["email"]}),
+        ("POST", "/courses/admin/<int:course_id>/broadcast", f"/courses/admin/{course_id}/broadcast", admin,
+         {"title": "News", "content": "Hello"}),
+        ("GET", "/messages/stream", "/messages/stream", student, None),
+        ("PATCH", "/messages/<int:message_id>/read", f"/messages/{message_id}/read", student, None),
+        ("GET", "/checkout/<int:course_id>", f"/checkout/{not_enrolled}", student, None),
+        ("POST", "/stripe/webhook", "/stripe/webhook", None, webhook.encode(),
+         {"Content-Type": "application/json", "Stripe-Signature": stripe_signature(webhook, WEBHOOK_SECRET)}),
+        ("GET", "/success", f"/success?course_id={enrolled}", student, None),
+        ("GET", "/receipts/export", f"/receipts/export?course_id={course_id}", admin, None),
+        ("GET", "/stats/principals", "/stats/principals", admin, None),
+        ("GET", "/stats/catalog-cache", "/stats/catalog-cache", admin, None),
+        ("GET", "/stats/db-pool", "/stats/db-pool", admin, None),
+        ("POST", "/courses/admin/import", "/courses/admin/import?format=ndjson", admin, (json.dumps(course) + "\n").encode(),
+         {"Content-Type": "application/x-ndjson"}),
+        ("GET", "/metrics", "/metrics", None, None),
+        ("GET", "/cancel", "/cancel", None, None),
+        ("POST", "/courses/admin/bulk-delete", "/courses/admin/bulk-delete", admin, {"course_ids": [course_ids[-1]]}),
+        ("DELETE", "/courses/admin/<int:courseId>", f"/courses/admin/{course_id}", admin, None),
+    ]
+
+
+def full_scans(dialect, plan):
+    if dialect == "sqlite":
+        return sorted({match.group(1) for _, _, _, detail in plan if (match := SQLITE_SCAN.match(detail))})
+
+    scans = set()
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan":
+            scans.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return sorted(scans)
+
+
+def explain(connection, dialect, statement, parameters):
+    if dialect == "sqlite":
+        return [tuple(row) for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    return connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore full scans of tables smaller than this")
+    parser.add_argument("--output", help="write every route's statements and plans to this file")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    # Ahead of this directory, whose course_import.py would shadow the app's
+    sys.path.insert(0, ROOT)
+
+    stub_server, _ = stripe_stub.serve(port=0)
+    threading.Thread(target=stub_server.serve_forever, daemon=True).start()
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(tmp, 'plans.db')}",
+        "CATALOG_CACHE_DIR": os.path.join(tmp, "catalog"),
+        "METRICS_DIR": os.path.join(tmp, "metrics"),
+        "STRIPE_API_BASE": f"http://127.0.0.1:{stub_server.server_address[1]}",
+        "STRIPE_WEBHOOK_SECRET": WEBHOOK_SECRET,
+        "PASSWORD_POOL_WORKERS": "0",
+        "SSE_MAX_DURATION": "1",
+        "SSE_POLL_INTERVAL": "0.2",
+    })
+    from flask import has_request_context
+    from flask_migrate import upgrade
+    from sqlalchemy import event, func, select, text
+
+    from app import app, db
+    from metrics import statement_shape
+    from models import Student
+    from seeds import bulk_seed
+
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, "migrations"))
+        if not db.session.scalar(select(func.count(Student.id))):
+            bulk_seed(args.students, args.courses, args.messages, password=BENCH_PASSWORD, seed=1,
+                      log=lambda line: print(line, file=sys.stderr, flush=True))
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+        dialect = db.engine.dialect.name
+        row_counts = {
+            table.name: db.session.scalar(select(func.count()).select_from(table))
+            for table in db.metadata.sorted_tables
+        }
+        users = sample_users(argparse.Namespace(users=1), db, app.config["SECRET_KEY"])
+        db.session.remove()
+        engine = db.engine
+
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and EXPLAINABLE.match(statement):
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    client = app.test_client()
+    report, violations = {}, []
+    for method, rule, path, user, body, *extra_headers in route_requests(users):
+        captured.clear()
+        headers = dict(*extra_headers)
+        if user:
+            headers["jwttoken"] = user["token"]
+        if isinstance(body, bytes):
+            response = client.open(path, method=method, headers=headers, data=body)
+        else:
+            response = client.open(path, method=method, headers=headers, json=body)
+        response.get_data()
+        response.close()
+
+        route = f"{method} {rule}"
+        entries = report.setdefault(route, [])
+        seen = {entry["statement"] for entry in entries}
+        with app.app_context(), db.engine.connect() as connection:
+            for statement, parameters in captured:
+                shape = statement_shape(statement)
+                if shape in seen:
+                    continue
+                seen.add(shape)
+                plan = explain(connection, dialect, statement, parameters)
+                scans = [table for table in full_scans(dialect, plan) if row_counts.get(table, 0) >= args.min_rows]
+                regressions = [table for table in scans if (route, table) not in ALLOWED_SCANS]
+                entries.append({"statement": shape, "status": response.status_code, "plan": plan, "full_scans": scans})
+                violations.extend((route, table, shape) for table in regressions)
+            connection.rollback()
+
+    stub_server.shutdown()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"dialect": dialect, "row_counts": row_counts, "routes": report}, f, indent=2, default=str)
+
+    for route, table, shape in violations:
+        print(f"FULL SCAN of {table} ({row_counts[table]} rows) in {route}:\n    {' '.join(shape.split())}\n", file=sys.stderr)
+    statements = sum(len(entries) for entries in report.values())
+    print(f"{len(report)} routes, {statements} statements explained, {len(violations)} unexpected full scans", file=sys.stderr)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Receipts rendered per second on one core: the original from-scratch canvas, the cached-logo template,
+# and a repeat download served from the receipt cache.
+#
+#   python benchmarks/receipt_render.py --seconds 3
+
+import argparse
+import datetime
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from receipts import LOGO_PATH, ReceiptCache, ReceiptTemplate
+
+
+# The pre-template implementation of generate_receipt, kept here as the baseline
+def render_from_scratch(name, email, title, price):
+    pdf_buffer = io.BytesIO()
+    p = canvas.Canvas(pdf_buffer, pagesize=letter)
+    p.drawImage(LOGO_PATH, 100, 800, width=100, height=100)
+    p.drawString(100, 750, "Moringa School")
+    p.drawString(100, 730, "Thank you for enrolling in our course.")
+    p.drawString(100, 710, f"Student Name: {name}")
+    p.drawString(100, 690, f"Email: {email}")
+    p.drawString(100, 670, f"Course Title: {title}")
+    p.drawString(100, 650, f"Course Price: ${price}")
+    p.drawString(100, 100, f"Purchase Date: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    p.showPage()
+    p.save()
+    return pdf_buffer.getvalue()
+
+
+def rate(fn, seconds):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        fn(count)
+        count += 1
+    return round(count / (time.perf_counter() - started), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    template = ReceiptTemplate()
+    cache = ReceiptCache()
+    fields = ("Student", "student@example.com", "Intro to Flask", 49.99)
+
+    print(json.dumps({
+        "from_scratch_per_second": rate(lambda i: render_from_scratch(f"Student {i}", *fields[1:]), args.seconds),
+        "template_per_second": rate(lambda i: template.render(f"Student {i}", *fields[1:]), args.seconds),
+        "cached_per_second": rate(lambda i: cache.get_or_render(fields, lambda: template.render(*fields)), args.seconds),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
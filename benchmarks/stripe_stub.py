@@ -0,0 +1,115 @@
+# Minimal local stand-in for the parts of the Stripe API that checkout uses.
+#
+#   python benchmarks/stripe_stub.py --port 12111 --latency-ms 150
+#   STRIPE_API_BASE=http://127.0.0.1:12111 flask run
+#
+# Handles products, prices and checkout sessions, replays responses for repeated Idempotency-Keys like Stripe does,
+# and reports request counts at GET /__stats. --latency-ms simulates Stripe's response time.
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+class StripeStub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.idempotent = {}
+        self.requests = {}
+        self.idempotent_replays = 0
+
+    def handle(self, method, path, form, idempotency_key):
+        with self.lock:
+            self.requests[f"{method} {path}"] = self.requests.get(f"{method} {path}", 0) + 1
+            if idempotency_key and idempotency_key in self.idempotent:
+                self.idempotent_replays += 1
+                return self.idempotent[idempotency_key]
+            next_id = next(self.ids)
+
+        if path == "/v1/products":
+            body = {"id": f"prod_stub{next_id}", "object": "product", "name": form.get("name")}
+        elif path.startswith("/v1/products/"):
+            body = {"id": path.rsplit("/", 1)[-1], "object": "product", "name": form.get("name")}
+        elif path == "/v1/prices":
+            body = {"id": f"price_stub{next_id}", "object": "price", "product": form.get("product"),
+                    "unit_amount": int(form.get("unit_amount", 0)), "currency": form.get("currency")}
+        elif path == "/v1/checkout/sessions":
+            body = {"id": f"cs_stub{next_id}", "object": "checkout.session",
+                    "url": f"https://checkout.stripe.test/c/cs_stub{next_id}", "metadata": {}}
+        else:
+            return 404, {"error": {"message": f"Unrecognized request URL ({method}: {path})", "type": "invalid_request_error"}}
+
+        if idempotency_key:
+            with self.lock:
+                self.idempotent[idempotency_key] = (200, body)
+        return 200, body
+
+    def stats(self):
+        with self.lock:
+            return {"requests": dict(self.requests), "idempotent_replays": self.idempotent_replays}
+
+
+def make_handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, keep-alive clients sit out a delayed ACK on each
+        disable_nagle_algorithm = True
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/__stats":
+                self._send(200, stub.stats())
+            else:
+                self._send(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            form = dict(parse_qsl(self.rfile.read(length).decode()))
+            if stub.latency:
+                time.sleep(stub.latency)
+            status, body = stub.handle("POST", self.path.split("?")[0], form, self.headers.get("Idempotency-Key"))
+            self._send(status, body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    # Room for a burst of connections from a high-concurrency worker
+    request_queue_size = 1024
+
+
+def serve(port=12111, latency=0.0):
+    stub = StripeStub(latency)
+    server = StubServer(("127.0.0.1", port), make_handler(stub))
+    server.daemon_threads = True
+    return server, stub
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    server, _ = serve(args.port, args.latency_ms / 1000)
+    print(f"Stripe stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
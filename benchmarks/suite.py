@@ -0,0 +1,593 @@
+# Load test of every route in app.py against a database seeded at a configurable scale.
+#
+#   python benchmarks/suite.py --students 100000 --courses 10000 --messages 1000000 --output before.json
+#   python benchmarks/suite.py --compare before.json after.json
+#
+# Seeds a throwaway SQLite file (or --database-url) with the bulk mode of seeds.py, starts the Stripe stub and
+# gunicorn, then runs each scenario for --duration seconds with --concurrency virtual users, each picking its next
+# request from the scenario's weighted mix. The result is JSON with requests, status counts, throughput and p50/p95/p99
+# latency (of 2xx/3xx responses) per route, keyed by scenario and route rule, so two runs can be diffed; --compare
+# prints the per-route change between two result files.
+#
+# Seeded users all log in with BENCH_PASSWORD. A --database-url that already has students is reused without reseeding,
+# so large datasets only need generating once (writes made by earlier runs stay in it). /messages/stream is left out:
+# its latency is however long the stream stays open.
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+try:
+    import brotli
+except ImportError:  # optional: without it the client only accepts gzip
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PASSWORD = "bench-password"
+WEBHOOK_SECRET = "whsec_suite"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# The users the virtual users act as, with tokens minted directly so no bcrypt work happens outside the login mix
+def sample_users(args, db, secret_key):
+    import datetime
+
+    import jwt
+    from sqlalchemy import select
+
+    from models import Admin, Course, Message, Student, student_courses
+
+    exp = datetime.datetime.now() + datetime.timedelta(hours=12)
+
+    def token(user_type, user_id, email):
+        return jwt.encode({"id": user_id, "email": email, "user_type": user_type, "exp": exp}, secret_key, algorithm="HS256")
+
+    student_ids = db.session.scalars(select(Student.id)).all()
+    picked = random.sample(student_ids, min(args.users, len(student_ids)))
+    students = {
+        student_id: {"id": student_id, "email": email, "username": username, "token": token("student", student_id, email),
+                     "message_ids": [], "enrolled": []}
+        for student_id, email, username in db.session.execute(
+            select(Student.id, Student.email, Student.username).where(Student.id.in_(picked))
+        )
+    }
+    for message_id, student_id in db.session.execute(
+        select(Message.id, Message.receiver_id)
+        .where(Message.receiver_id.in_(picked), Message.admin_sender_id.is_not(None))
+    ):
+        students[student_id]["message_ids"].append(message_id)
+    for student_id, course_id in db.session.execute(
+        select(student_courses.c.student_id, student_courses.c.course_id).where(student_courses.c.student_id.in_(picked))
+    ):
+        students[student_id]["enrolled"].append(course_id)
+
+    admin_ids = db.session.scalars(select(Admin.id)).all()
+    picked = random.sample(admin_ids, min(args.users, len(admin_ids)))
+    admins = {
+        admin_id: {"id": admin_id, "email": email, "token": token("admin", admin_id, email), "course_ids": []}
+        for admin_id, email in db.session.execute(select(Admin.id, Admin.email).where(Admin.id.in_(picked)))
+    }
+    for course_id, admin_id in db.session.execute(select(Course.id, Course.admin_id).where(Course.admin_id.in_(picked))):
+        admins[admin_id]["course_ids"].append(course_id)
+
+    return {
+        "students": sorted(students.values(), key=lambda s: s["id"]),
+        "admins": sorted(admins.values(), key=lambda a: a["id"]),
+        "course_ids": db.session.scalars(select(Course.id).order_by(Course.id)).all(),
+    }
+
+
+# Runs in a child process with the suite's DATABASE_URL
+def prepare(args):
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import func, select
+
+    from app import app, db
+    from models import Student
+    from seeds import bulk_seed
+
+    random.seed(args.random_seed)
+    with app.app_context():
+        db.create_all()
+        if db.session.scalar(select(func.count(Student.id))):
+            print("Database already seeded, reusing it", file=sys.stderr, flush=True)
+        else:
+            bulk_seed(args.students, args.courses, args.messages, admins=args.admins, modules=args.modules,
+                      enrollments=args.enrollments, batch_size=args.batch_size, password=BENCH_PASSWORD,
+                      seed=args.random_seed, log=lambda line: print(line, file=sys.stderr, flush=True))
+        print(json.dumps(sample_users(args, db, app.config["SECRET_KEY"])))
+
+
+def stripe_signature(payload, secret):
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def decode_body(headers, body):
+    if headers.get("transfer-encoding") == "chunked":
+        decoded = b""
+        while body:
+            size_line, _, body = body.partition(b"\r\n")
+            size = int(size_line.split(b";")[0], 16)
+            if not size:
+                break
+            decoded, body = decoded + body[:size], body[size + 2:]
+        body = decoded
+    encoding = headers.get("content-encoding")
+    if encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding == "br":
+        body = brotli.decompress(body)
+    return body
+
+
+# One HTTP/1.1 request on a fresh connection. Returns (status, headers, body); status is None if the request failed.
+async def http_request(port, method, path, headers, body, timeout):
+    head = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close",
+            f"Accept-Encoding: {'br, gzip' if brotli else 'gzip'}", f"Content-Length: {len(body)}"]
+    head.extend(f"{name}: {value}" for name, value in headers.items())
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        raw = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        header_block, _, response_body = raw.partition(b"\r\n\r\n")
+        lines = header_block.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        response_headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        return status, response_headers, response_body
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        return None, {}, b""
+
+
+class VirtualUser:
+    def __init__(self, index, args, users, port, results):
+        self.rng = random.Random(args.random_seed * 1000 + index)
+        self.student = users["students"][index % len(users["students"])]
+        self.admin = users["admins"][index % len(users["admins"])]
+        self.course_ids = users["course_ids"]
+        self.port = port
+        self.timeout = args.timeout
+        self.results = results
+        self.name = f"{uuid.uuid4().hex[:8]}-{index}"
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{self.name}-{self.counter}"
+
+    # Send a request and record it under `route`; returns (status, parsed JSON body or None)
+    async def request(self, route, method, path, token=None, json_body=None, body=b"", headers=None):
+        headers = dict(headers or {})
+        if token:
+            headers["jwttoken"] = token
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+
+        started = time.perf_counter()
+        status, response_headers, response_body = await http_request(self.port, method, path, headers, body, self.timeout)
+        elapsed = time.perf_counter() - started
+
+        stats = self.results.setdefault(f"{method} {route}", {"statuses": {}, "latencies": []})
+        stats["statuses"][str(status or "error")] = stats["statuses"].get(str(status or "error"), 0) + 1
+        if status is None or status >= 400:
+            return status, None
+        stats["latencies"].append(elapsed)
+        if response_headers.get("content-type", "").startswith("application/json"):
+            try:
+                return status, json.loads(decode_body(response_headers, response_body))
+            except (ValueError, OSError):
+                pass
+        return status, None
+
+
+def course_payload(vu):
+    return {
+        "title": vu.unique("Suite course"),
+        "description": "Benchmark course",
+        "price": 20,
+        "modules": [{"title": f"Module {m}", "media": f"https://example.com/{m}", "notes": "Notes " * 20} for m in range(3)],
+    }
+
+
+# Catalog browsing
+async def browse_catalog(vu):
+    cursor = "" if vu.rng.random() < 0.5 else f"&cursor={vu.rng.choice(vu.course_ids)}"
+    await vu.request("/course", "GET", f"/course?limit=20{cursor}", vu.student["token"])
+
+
+async def course_detail(vu):
+    await vu.request("/student/course/<int:course_id>", "GET", f"/student/course/{vu.rng.choice(vu.course_ids)}",
+                     vu.student["token"])
+
+
+async def course_modules(vu):
+    await vu.request("/student/course/<int:course_id>/module", "GET",
+                     f"/student/course/{vu.rng.choice(vu.course_ids)}/module", vu.student["token"])
+
+
+# Student inbox and profile
+async def student_inbox(vu):
+    await vu.request("/messages/from-admin", "GET", "/messages/from-admin", vu.student["token"])
+
+
+async def student_courses(vu):
+    await vu.request("/courses/student", "GET", "/courses/student", vu.student["token"])
+
+
+async def student_dashboard(vu):
+    await vu.request("/student/dashboard", "GET", "/student/dashboard", vu.student["token"])
+
+
+async def read_message(vu):
+    if vu.student["message_ids"]:
+        message_id = vu.rng.choice(vu.student["message_ids"])
+        await vu.request("/messages/<int:message_id>/read", "PATCH", f"/messages/{message_id}/read", vu.student["token"])
+
+
+async def message_admin(vu):
+    await vu.request("/messages/student", "POST", "/messages/student", vu.student["token"],
+                     {"title": "Question", "content": "When does the next module open?", "admin_id": vu.admin["id"]})
+
+
+async def search_admins(vu):
+    await vu.request("/admins", "GET", f"/admins?email={vu.admin['email'][:3]}", vu.student["token"])
+
+
+async def student_profile(vu):
+    await vu.request("/profile/student", "GET", "/profile/student", vu.student["token"])
+
+
+async def update_student_profile(vu):
+    await vu.request("/profile/student", "POST", "/profile/student", vu.student["token"],
+                     {"username": vu.unique(vu.student["username"])})
+
+
+# Admin course management and inbox
+async def admin_course_list(vu):
+    await vu.request("/courses/admin", "GET", "/courses/admin", vu.admin["token"])
+
+
+async def admin_inbox(vu):
+    await vu.request("/messages/admin", "GET", "/messages/admin", vu.admin["token"])
+
+
+async def message_student(vu):
+    await vu.request("/messages/admin", "POST", "/messages/admin", vu.admin["token"],
+                     {"title": "Reminder", "content": "Assignment due Friday", "email": vu.student["email"]})
+
+
+async def search_students(vu):
+    await vu.request("/studentsmail", "GET", f"/studentsmail?email={vu.student['email'][:3]}", vu.admin["token"])
+
+
+async def admin_profile(vu):
+    await vu.request("/profile/admin", "GET", "/profile/admin", vu.admin["token"])
+
+
+async def update_course(vu):
+    if vu.admin["course_ids"]:
+        await vu.request("/courses/admin", "PATCH", "/courses/admin", vu.admin["token"],
+                         {"course_id": vu.rng.choice(vu.admin["course_ids"]), "title": vu.unique("Updated course")})
+
+
+async def create_and_delete_course(vu):
+    status, body = await vu.request("/courses/admin", "POST", "/courses/admin", vu.admin["token"], course_payload(vu))
+    if status == 201:
+        course_id = body["course_id"]
+        await vu.request("/courses/admin/<int:courseId>", "DELETE", f"/courses/admin/{course_id}", vu.admin["token"])
+
+
+async def bulk_delete_courses(vu):
+    course_ids = []
+    for _ in range(2):
+        status, body = await vu.request("/courses/admin", "POST", "/courses/admin", vu.admin["token"], course_payload(vu))
+        if status == 201:
+            course_ids.append(body["course_id"])
+    if course_ids:
+        await vu.request("/courses/admin/bulk-delete", "POST", "/courses/admin/bulk-delete", vu.admin["token"],
+                         {"course_ids": course_ids})
+
+
+async def import_courses(vu):
+    body = "".join(json.dumps(course_payload(vu)) + "\n" for _ in range(20)).encode()
+    await vu.request("/courses/admin/import", "POST", "/courses/admin/import?dry_run=1", vu.admin["token"],
+                     body=body, headers={"Content-Type": "application/x-ndjson"})
+
+
+async def broadcast(vu):
+    if vu.admin["course_ids"]:
+        course_id = vu.rng.choice(vu.admin["course_ids"])
+        await vu.request("/courses/admin/<int:course_id>/broadcast", "POST", f"/courses/admin/{course_id}/broadcast",
+                         vu.admin["token"], {"title": "Announcement", "content": "Live session tomorrow"})
+
+
+async def export_receipts(vu):
+    if vu.admin["course_ids"]:
+        await vu.request("/receipts/export", "GET", f"/receipts/export?course_id={vu.rng.choice(vu.admin['course_ids'])}",
+                         vu.admin["token"])
+
+
+async def stats_endpoints(vu):
+    route = vu.rng.choice(["/stats/principals", "/stats/catalog-cache", "/stats/db-pool", "/metrics"])
+    await vu.request(route, "GET", route, vu.admin["token"])
+
+
+# Logins and signups, all paying for bcrypt
+async def student_login(vu):
+    await vu.request("/student/login", "POST", "/student/login", json_body={"email": vu.student["email"], "password": BENCH_PASSWORD})
+
+
+async def admin_login(vu):
+    await vu.request("/admin/login", "POST", "/admin/login", json_body={"email": vu.admin["email"], "password": BENCH_PASSWORD})
+
+
+async def student_signup(vu):
+    username = vu.unique("suite")
+    await vu.request("/signup/student", "POST", "/signup/student",
+                     json_body={"email": f"{username}@example.com", "username": username, "password": BENCH_PASSWORD})
+
+
+async def admin_signup(vu):
+    await vu.request("/signup/admin", "POST", "/signup/admin",
+                     json_body={"email": f"{vu.unique('suite-admin')}@example.com", "password": BENCH_PASSWORD})
+
+
+# Checkout against the Stripe stub, then the payment webhook Stripe would send and the receipt download
+async def checkout(vu):
+    course_id = vu.rng.choice(vu.course_ids)
+    if course_id in vu.student["enrolled"]:
+        return
+    status, _ = await vu.request("/checkout/<int:course_id>", "GET", f"/checkout/{course_id}", vu.student["token"])
+    if status != 200:
+        return
+
+    payload = json.dumps({
+        "id": f"evt_{vu.unique('suite')}",
+        "type": "checkout.session.completed",
+        "data": {"object": {"payment_status": "paid",
+                            "metadata": {"student_id": str(vu.student["id"]), "course_id": str(course_id)}}},
+    })
+    status, _ = await vu.request("/stripe/webhook", "POST", "/stripe/webhook", body=payload.encode(),
+                                 headers={"Content-Type": "application/json", "Stripe-Signature": stripe_signature(payload, WEBHOOK_SECRET)})
+    if status == 200:
+        vu.student["enrolled"].append(course_id)
+
+
+async def receipt(vu):
+    if vu.student["enrolled"]:
+        await vu.request("/success", "GET", f"/success?course_id={vu.rng.choice(vu.student['enrolled'])}", vu.student["token"])
+
+
+async def cancel(vu):
+    await vu.request("/cancel", "GET", "/cancel")
+
+
+SCENARIOS = {
+    "browse": [(50, browse_catalog), (30, course_detail), (20, course_modules)],
+    "student": [(15, student_dashboard), (20, student_inbox), (10, student_courses), (15, read_message), (10, message_admin),
+                (10, student_profile), (5, update_student_profile), (5, search_admins), (10, browse_catalog)],
+    "admin": [(20, admin_course_list), (20, admin_inbox), (10, message_student), (8, search_students), (8, admin_profile),
+              (10, update_course), (6, create_and_delete_course), (3, bulk_delete_courses), (4, import_courses),
+              (3, broadcast), (2, export_receipts), (6, stats_endpoints)],
+    "login_storm": [(45, student_login), (15, admin_login), (5, student_signup), (2, admin_signup), (33, browse_catalog)],
+    "checkout": [(60, checkout), (15, receipt), (5, cancel), (20, browse_catalog)],
+}
+
+
+async def run_scenario(args, name, users, port):
+    weights, operations = zip(*((weight, op) for weight, op in SCENARIOS[name]))
+    results = {}
+    deadline = time.perf_counter() + args.duration
+
+    async def virtual_user(index):
+        vu = VirtualUser(index, args, users, port, results)
+        while time.perf_counter() < deadline:
+            await vu.rng.choices(operations, weights)[0](vu)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route, stats in sorted(results.items()):
+        latencies = stats["latencies"]
+        routes[route] = {
+            "requests": sum(stats["statuses"].values()),
+            "statuses": dict(sorted(stats["statuses"].items())),
+            "throughput_rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        }
+    return {
+        "duration_s": round(elapsed, 1),
+        "throughput_rps": round(sum(len(stats["latencies"]) for stats in results.values()) / elapsed, 1),
+        "routes": routes,
+    }
+
+
+# The master accepts connections before the worker has imported the app, so wait for a real response
+def wait_for_server(port, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        status, _, _ = asyncio.run(http_request(port, "GET", "/cancel", {}, b"", 5))
+        if status == 200:
+            return
+        time.sleep(0.2)
+    raise RuntimeError("server did not start answering")
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'suite.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, CATALOG_CACHE_DIR=os.path.join(tmp, "catalog"),
+                   METRICS_DIR=os.path.join(tmp, "metrics"))
+        seed_args = [sys.executable, __file__, "--prepare", "--random-seed", str(args.random_seed), "--users", str(args.users),
+                     "--batch-size", str(args.batch_size)]
+        for option in ("students", "courses", "messages", "admins", "modules", "enrollments"):
+            seed_args += [f"--{option}", str(getattr(args, option))]
+        output = subprocess.run(seed_args, env=dict(env, PASSWORD_POOL_WORKERS="0"), check=True,
+                                stdout=subprocess.PIPE, text=True).stdout
+        users = json.loads(output.strip().splitlines()[-1])
+
+        # The stub gets its own process so it doesn't compete with the load generator for the GIL
+        stripe_port = free_port()
+        stripe_stub = subprocess.Popen([
+            sys.executable, os.path.join(ROOT, "benchmarks", "stripe_stub.py"),
+            "--port", str(stripe_port), "--latency-ms", str(args.stripe_latency_ms),
+        ], stdout=subprocess.DEVNULL)
+
+        env.update({
+            "STRIPE_API_BASE": f"http://127.0.0.1:{stripe_port}",
+            "STRIPE_WEBHOOK_SECRET": WEBHOOK_SECRET,
+            "WEB_CONCURRENCY": str(args.workers),
+            "GUNICORN_WORKER_CLASS": args.worker_class,
+            "GUNICORN_THREADS": str(args.threads),
+        })
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}",
+             "--timeout", str(args.timeout * 2), "--graceful-timeout", "5", "--log-level", "warning", "app:app"],
+            cwd=ROOT, env=env,
+        )
+
+        scenarios = {}
+        try:
+            wait_for_server(port, server)
+            for name in args.scenarios:
+                print(f"Running {name} for {args.duration}s", file=sys.stderr, flush=True)
+                scenarios[name] = asyncio.run(run_scenario(args, name, users, port))
+        finally:
+            for process in (server, stripe_stub):
+                process.terminate()
+                try:
+                    process.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+
+    commit, dirty = git_revision()
+    return {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "python": platform.python_version(),
+            "database": "sqlite" if database_url.startswith("sqlite") else database_url.split(":", 1)[0],
+            "scale": {option: getattr(args, option) for option in ("students", "courses", "messages", "admins", "modules", "enrollments")},
+            "server": {"worker_class": args.worker_class, "workers": args.workers, "threads": args.threads},
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "stripe_latency_ms": args.stripe_latency_ms,
+            "random_seed": args.random_seed,
+        },
+        "scenarios": scenarios,
+    }
+
+
+# Per-route change between two result files, for routes present in both
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    report = {}
+    for scenario, result in after["scenarios"].items():
+        for route, stats in result["routes"].items():
+            old = before["scenarios"].get(scenario, {}).get("routes", {}).get(route)
+            if not old:
+                continue
+            report.setdefault(scenario, {})[route] = {
+                key: {"before": old[key], "after": stats[key],
+                      "change_pct": round((stats[key] - old[key]) / old[key] * 100, 1) if old[key] else None}
+                for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            }
+    return {"before": before["meta"].get("commit"), "after": after["meta"].get("commit"), "scenarios": report}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--admins", type=int, default=0, help="defaults to one admin per 20 courses")
+    parser.add_argument("--modules", type=int, default=5, help="average modules per course")
+    parser.add_argument("--enrollments", type=int, default=3, help="average enrollments per student")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=500, help="distinct students and admins the virtual users act as")
+    parser.add_argument("--random-seed", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--duration", type=int, default=30, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--stripe-latency-ms", type=float, default=150)
+    parser.add_argument("--timeout", type=int, default=30)
+    parser.add_argument("--database-url")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--prepare", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.prepare:
+        prepare(args)
+        return
+    if args.compare:
+        print(json.dumps(compare(*args.compare), indent=2))
+        return
+
+    results = run(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: bumps are not locked, which is fine for a single process
+    fcntl = None
+
+from config import app
+
+
+# Pre-serialized catalog responses shared by every worker on the host.
+# Bodies live in files named after the current generation; admin course writes bump the generation,
+# which makes every older file unreachable at once. Each worker also keeps an LRU of the bodies it has served in memory.
+class CatalogCache:
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.generation_path = os.path.join(directory, "generation")
+        self.max_entries = max_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def generation(self):
+        try:
+            with open(self.generation_path) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    # When the current generation was written, i.e. the last admin course change
+    def bumped_at(self):
+        try:
+            return os.path.getmtime(self.generation_path)
+        except FileNotFoundError:
+            return 0.0
+
+    def bump(self):
+        with open(self.generation_path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            generation = int(f.read() or 0) + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(generation))
+            f.flush()
+        self._prune(generation)
+        return generation
+
+    def _prune(self, generation):
+        for name in os.listdir(self.directory):
+            prefix = name.split("-", 1)[0]
+            if name.endswith(".json") and prefix.isdigit() and int(prefix) < generation:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, generation, key):
+        return os.path.join(self.directory, f"{generation}-{hashlib.sha256(key.encode()).hexdigest()}.json")
+
+    # Returns (body, etag). `build` returns the body bytes, or None for responses that must not be cached.
+    # `cacheable`, when given, is asked after a miss whether this key is worth storing at all.
+    def get_or_build(self, key, build, cacheable=None):
+        # Read the generation before building so a concurrent write can only leave a stale body under an old generation
+        generation = self.generation()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry and entry[0] == generation:
+                self._local.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+
+        path = self._path(generation, key)
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+            with self._lock:
+                self.shared_hits += 1
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            body = build()
+            if body is None:
+                return None, None
+            if cacheable is not None and not cacheable():
+                return body, hashlib.sha256(body).hexdigest()
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.rebuilds += 1
+
+        etag = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self._local[key] = (generation, body, etag)
+            # Drop bodies from older generations so a worker's memory tracks only the live catalog
+            for stale_key in [k for k, v in self._local.items() if v[0] != generation]:
+                del self._local[stale_key]
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+        return body, etag
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "generation": self.generation(),
+                "local_entries": len(self._local),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "rebuilds": self.rebuilds,
+                "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+catalog_cache = CatalogCache(app.config["CATALOG_CACHE_DIR"], app.config["CATALOG_CACHE_SIZE"])
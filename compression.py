@@ -0,0 +1,128 @@
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+from flask import request
+
+from config import app
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/javascript", "image/svg+xml"}
+
+
+def _gzip(body, level):
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body, level):
+    return brotli.compress(body, quality=level)
+
+
+COMPRESSORS = {"gzip": _gzip}
+if brotli is not None:
+    COMPRESSORS["br"] = _brotli
+
+
+# Pick the encoding for an Accept-Encoding header: brotli over gzip, honouring q=0 and "*"
+def negotiate(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+
+    for coding in ("br", "gzip"):
+        if coding not in COMPRESSORS:
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > 0:
+            return coding
+    return None
+
+
+# Per-worker LRU of compressed bodies keyed by (ETag, encoding). The ETag is a hash of the uncompressed body,
+# so an entry can never go stale; it just stops being asked for once the catalog changes.
+class CompressedCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, etag, encoding, body, level):
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+        compressed = COMPRESSORS[encoding](body, level)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+compressed_cache = CompressedCache(app.config["COMPRESS_CACHE_SIZE"])
+
+
+def _compressible(response):
+    return (
+        not response.direct_passthrough
+        and not response.is_streamed
+        and 200 <= response.status_code < 300
+        and response.status_code != 204
+        and "Content-Encoding" not in response.headers
+        and (response.mimetype in COMPRESSIBLE_MIMETYPES or response.mimetype.startswith("text/"))
+    )
+
+
+# Compress every buffered text/JSON response of at least COMPRESS_MIN_SIZE bytes. Responses built by
+# cached_json_response carry `precompressed=True`: they are compressed once at the highest level and reused.
+@app.after_request
+def compress_response(response):
+    if not _compressible(response):
+        return response
+    body = response.get_data()
+    if len(body) < app.config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if etag and getattr(response, "precompressed", False):
+        body = compressed_cache.get_or_compress(etag, encoding, body, app.config["COMPRESS_CACHED_LEVELS"][encoding])
+    else:
+        body = COMPRESSORS[encoding](body, app.config["COMPRESS_LEVELS"][encoding])
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag and not weak:
+        # The bytes now differ per encoding; a weak validator still matches If-None-Match for any of them
+        response.set_etag(etag, weak=True)
+    return response
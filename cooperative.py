@@ -0,0 +1,31 @@
+import sys
+
+
+# True inside a gunicorn gevent worker (or anything else that ran gevent's monkey.patch_all before importing the app)
+def gevent_active():
+    if "gevent.monkey" not in sys.modules:
+        return False
+    from gevent import monkey
+
+    return monkey.is_module_patched("socket")
+
+
+# Sockets, threading and time are already patched by gevent. psycopg2 is a C extension that does its own I/O,
+# so it gets a wait callback that yields to the hub instead of blocking the worker on every query.
+def make_cooperative():
+    if not gevent_active():
+        return False
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
+    return True
+
+
+# Executor whose workers are real OS threads, for CPU-bound C code such as bcrypt. Under gevent a patched
+# ThreadPoolExecutor would run it on a greenlet and stall every other request in the worker.
+def native_thread_executor(max_workers):
+    if gevent_active():
+        from gevent.threadpool import ThreadPoolExecutor
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=max_workers)
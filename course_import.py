@@ -0,0 +1,256 @@
+import csv
+import io
+import json
+import math
+import time
+
+from sqlalchemy import insert
+
+from config import db
+from models import Course, Module, admin_courses
+
+
+class RowError(Exception):
+    pass
+
+
+# Gunicorn hands the request body over as its own file-like object, which TextIOWrapper can't wrap directly
+class _RawBody(io.RawIOBase):
+    def __init__(self, stream):
+        self._stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _text(stream, **kwargs):
+    if not isinstance(stream, io.IOBase):
+        stream = io.BufferedReader(_RawBody(stream))
+    return io.TextIOWrapper(stream, encoding="utf-8", **kwargs)
+
+
+# Each parser yields (row_number, course_dict) or (row_number, RowError) and reads its input a line or chunk at a time
+
+def parse_ndjson(stream):
+    for row_number, line in enumerate(_text(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError as e:
+            yield row_number, RowError(f"Invalid JSON: {e}")
+
+
+# Incrementally decodes a top-level JSON array of course objects without loading the whole document
+def parse_json_array(stream, chunk_size=64 * 1024):
+    reader = _text(stream)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    row_number = 0
+    eof = False
+
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer and not eof:
+                chunk = reader.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if not buffer.startswith("["):
+                yield 0, RowError("Expected a JSON array of courses")
+                return
+            buffer = buffer[1:]
+            started = True
+            continue
+
+        buffer = buffer.lstrip(", \t\r\n")
+        if buffer.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buffer)
+        except ValueError as e:
+            if eof:
+                if buffer:
+                    yield row_number + 1, RowError(f"Invalid JSON: {e}")
+                return
+            chunk = reader.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        row_number += 1
+        buffer = buffer[end:]
+        yield row_number, record
+
+
+# CSV has one row per module; consecutive rows with the same title make up one course.
+# Columns: title, description, thumbnail, price, module_title, module_media, module_notes
+def parse_csv(stream):
+    course, first_row = None, None
+    for row_number, row in enumerate(csv.DictReader(_text(stream, newline="")), start=2):
+        if course is not None and row.get("title") != course["title"]:
+            yield first_row, course
+            course = None
+        if course is None:
+            course = {
+                "title": row.get("title"),
+                "description": row.get("description"),
+                "thumbnail": row.get("thumbnail") or None,
+                "price": row.get("price"),
+                "modules": [],
+            }
+            first_row = row_number
+        if row.get("module_title") or row.get("module_media"):
+            course["modules"].append({
+                "title": row.get("module_title"),
+                "media": row.get("module_media"),
+                "notes": row.get("module_notes") or None,
+            })
+    if course is not None:
+        yield first_row, course
+
+
+PARSERS = {
+    "ndjson": parse_ndjson,
+    "json": parse_json_array,
+    "csv": parse_csv,
+}
+
+
+# A string field of a course or module row, checked against its column. Empty optional fields become None.
+def _string(record, field, column, required=True, where=""):
+    value = record.get(field)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"{where}{field} is required")
+        return None
+    if not isinstance(value, str):
+        raise RowError(f"{where}{field} must be a string")
+    length = getattr(column.type, "length", None)
+    if length and len(value) > length:
+        raise RowError(f"{where}{field} must be at most {length} characters")
+    return value
+
+
+def validate_course(record):
+    if not isinstance(record, dict):
+        raise RowError("Each course must be an object")
+    title = _string(record, "title", Course.title)
+    description = _string(record, "description", Course.description)
+    thumbnail = _string(record, "thumbnail", Course.thumbnail, required=False)
+
+    price = record.get("price")
+    if isinstance(price, bool):
+        raise RowError("price must be a number")
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise RowError("price must be a number")
+    if not math.isfinite(price):
+        raise RowError("price must be a finite number")
+    if price < 0:
+        raise RowError("price must not be negative")
+
+    module_records = record.get("modules") or []
+    if not isinstance(module_records, list):
+        raise RowError("modules must be a list")
+    modules = []
+    for position, module in enumerate(module_records, start=1):
+        where = f"module {position} "
+        if not isinstance(module, dict):
+            raise RowError(f"module {position} must be an object")
+        module_position = module.get("position", position)
+        if not isinstance(module_position, int) or isinstance(module_position, bool):
+            raise RowError(f"{where}position must be an integer")
+        modules.append({
+            "title": _string(module, "title", Module.title, where=where),
+            "media": _string(module, "media", Module.media, where=where),
+            "notes": _string(module, "notes", Module.notes, required=False, where=where),
+            "position": module_position,
+        })
+
+    course = {
+        "title": title,
+        "description": description,
+        "thumbnail": thumbnail,
+        "price": price,
+    }
+    return course, modules
+
+
+# Inserts parsed courses for one admin in batches of `batch_size`, one transaction per batch.
+# Only the current batch is held in memory, and at most `max_errors` row errors are kept for the report.
+class CourseImporter:
+    def __init__(self, admin_id, batch_size=500, dry_run=False, max_errors=100):
+        self.admin_id = admin_id
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.max_errors = max_errors
+        self.rows = 0
+        self.courses = 0
+        self.modules = 0
+        self.error_count = 0
+        self.errors = []
+
+    def _record_error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "error": message})
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        if not self.dry_run:
+            course_ids = db.session.scalars(
+                insert(Course).returning(Course.id, sort_by_parameter_order=True),
+                [{**course, "admin_id": self.admin_id} for course, _ in batch]
+            ).all()
+            module_rows = [
+                {**module, "course_id": course_id}
+                for course_id, (_, modules) in zip(course_ids, batch)
+                for module in modules
+            ]
+            if module_rows:
+                db.session.execute(insert(Module), module_rows)
+            db.session.execute(insert(admin_courses), [
+                {"admin_id": self.admin_id, "course_id": course_id} for course_id in course_ids
+            ])
+            db.session.commit()
+        self.courses += len(batch)
+        self.modules += sum(len(modules) for _, modules in batch)
+        batch.clear()
+
+    def run(self, records):
+        started = time.perf_counter()
+        batch = []
+        for row_number, record in records:
+            self.rows += 1
+            if isinstance(record, RowError):
+                self._record_error(row_number, str(record))
+                continue
+            try:
+                batch.append(validate_course(record))
+            except RowError as e:
+                self._record_error(row_number, str(e))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+        self._flush(batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "courses_imported": self.courses,
+            "modules_imported": self.modules,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else None,
+        }
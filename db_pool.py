@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import g, has_app_context, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+# Per-worker connection pool counters, reported by /stats/db-pool
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.max_overflow_seen = 0
+
+    def record_checkout(self, waited, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.max_overflow_seen = max(self.max_overflow_seen, overflow)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self, pool):
+        with self._lock:
+            stats = {
+                "pid": os.getpid(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_avg": round(self.wait_seconds / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "max_overflow_seen": self.max_overflow_seen,
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+# QueuePool that times how long each checkout waited for a free connection
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - started, max(self.overflow(), 0))
+        return connection
+
+
+# SQLALCHEMY_ENGINE_OPTIONS built from config. SQLite keeps its default pool sizing (in-memory databases their
+# single static connection) and only gains the instrumentation.
+def engine_options(config):
+    uri = config["SQLALCHEMY_DATABASE_URI"]
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"]}
+    if uri.startswith("sqlite"):
+        if ":memory:" not in uri and uri.rstrip("/") != "sqlite:":
+            options["poolclass"] = InstrumentedQueuePool
+        return options
+
+    options.update({
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+    })
+    if uri.startswith("postgres"):
+        # psycopg2's executemany is one round trip per row; batch mode sends them in pages with execute_batch, so
+        # bulk UPDATEs by primary key (module edits in PATCH /courses/admin) cost one round trip per page.
+        # psycopg 3 already pipelines executemany.
+        if make_url(uri).get_dialect().driver == "psycopg2":
+            options["executemany_mode"] = "values_plus_batch"
+        connect_args = {"application_name": config["DB_APPLICATION_NAME"]}
+        # PgBouncer in transaction mode drops startup options, so the timeout is set per transaction instead
+        if not config["DB_PGBOUNCER"] and config["STATEMENT_TIMEOUT_MS"]:
+            connect_args["options"] = f"-c statement_timeout={int(config['STATEMENT_TIMEOUT_MS'])}"
+        options["connect_args"] = connect_args
+    return options
+
+
+# Route class for statement timeouts: decorated views run their transactions with the given config key's timeout
+def statement_timeout(config_key):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            g.statement_timeout_ms = current_app.config[config_key]
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@event.listens_for(Engine, "begin")
+def _apply_statement_timeout(conn):
+    if conn.dialect.name != "postgresql" or not has_app_context():
+        return
+    config = current_app.config
+    timeout = g.get("statement_timeout_ms")
+    if timeout is None:
+        # Without PgBouncer the default already came from the connection's startup options
+        if not config["DB_PGBOUNCER"]:
+            return
+        timeout = config["STATEMENT_TIMEOUT_MS"]
+    if timeout:
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+@event.listens_for(QueuePool, "connect")
+def _count_connect(dbapi_connection, connection_record):
+    pool_metrics.record_connect()
+
+
+# A forked child starts its own counters; its pooled connections are dropped by gunicorn.conf.py's post_fork
+os.register_at_fork(after_in_child=lambda: pool_metrics.__init__())
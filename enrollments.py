@@ -0,0 +1,96 @@
+import logging
+import threading
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import app, db
+from models import EnrollmentEvent, student_courses
+
+logger = logging.getLogger(__name__)
+
+
+def _dialect_insert(table):
+    return (postgresql.insert if db.engine.dialect.name == "postgresql" else sqlite.insert)(table)
+
+
+# Record a paid checkout. Stripe retries webhooks, so a repeated event id is ignored.
+def enqueue_enrollment(stripe_event_id, student_id, course_id):
+    db.session.execute(
+        _dialect_insert(EnrollmentEvent.__table__)
+        .values(stripe_event_id=stripe_event_id, student_id=student_id, course_id=course_id)
+        .on_conflict_do_nothing(index_elements=["stripe_event_id"])
+    )
+    db.session.commit()
+
+
+# Move one batch from the queue into student_courses in a single transaction; returns how many events it consumed.
+# On Postgres the batch is claimed with SKIP LOCKED so several workers can drain side by side.
+def drain_enrollments(batch_size):
+    claim = select(EnrollmentEvent.id).order_by(EnrollmentEvent.id).limit(batch_size)
+    if db.engine.dialect.name == "postgresql":
+        claim = claim.with_for_update(skip_locked=True)
+    event_ids = db.session.scalars(claim).all()
+    if not event_ids:
+        db.session.rollback()
+        return 0
+
+    enroll = _dialect_insert(student_courses).from_select(
+        ["student_id", "course_id"],
+        select(EnrollmentEvent.student_id, EnrollmentEvent.course_id).where(EnrollmentEvent.id.in_(event_ids))
+    ).on_conflict_do_nothing(index_elements=["student_id", "course_id"])
+    db.session.execute(enroll)
+    db.session.execute(delete(EnrollmentEvent).where(EnrollmentEvent.id.in_(event_ids)))
+    db.session.commit()
+    return len(event_ids)
+
+
+# One background thread per worker that drains the queue whenever a webhook arrives, and every
+# ENROLLMENT_DRAIN_INTERVAL seconds to pick up anything another worker left behind.
+class EnrollmentWriter:
+    def __init__(self, batch_size=500, interval=5.0):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.enrolled = 0
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="enrollment-writer")
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                with app.app_context():
+                    while True:
+                        drained = drain_enrollments(self.batch_size)
+                        self.enrolled += drained
+                        if drained < self.batch_size:
+                            break
+            except Exception:
+                logger.exception("Enrollment writer failed, retrying on the next wake-up")
+
+
+enrollment_writer = EnrollmentWriter(
+    batch_size=app.config["ENROLLMENT_BATCH_SIZE"],
+    interval=app.config["ENROLLMENT_DRAIN_INTERVAL"],
+)
+
+
+@app.cli.command("drain-enrollments")
+def drain_enrollments_command():
+    """Write every queued enrollment to student_courses."""
+    total = 0
+    while True:
+        drained = drain_enrollments(app.config["ENROLLMENT_BATCH_SIZE"])
+        total += drained
+        if drained < app.config["ENROLLMENT_BATCH_SIZE"]:
+            break
+    print(f"✅ Enrolled {total} queued checkouts.")
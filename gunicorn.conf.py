@@ -0,0 +1,40 @@
+import os
+
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+# gthread (default) or gevent. gevent serves up to GUNICORN_WORKER_CONNECTIONS requests per worker at once,
+# so requests parked on Stripe, a slow query or an SSE stream cost a greenlet rather than a thread.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# config.py sizes the password pool (PASSWORD_POOL_WORKERS + PASSWORD_POOL_QUEUE, half of this by default) and the
+# SSE stream cap (a quarter) from the same variable, so raising it raises both
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+# gevent has to patch the standard library before the app is imported, which a preloading master can't do
+preload_app = os.getenv('GUNICORN_PRELOAD', '0') == '1' and worker_class != 'gevent'
+
+
+def on_starting(server):
+    # Worker snapshots from the previous run would otherwise be summed into /metrics. Same default as config.py,
+    # worked out here so the master never imports the app.
+    metrics_dir = os.getenv('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+    if os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            os.remove(os.path.join(metrics_dir, name))
+
+
+def post_fork(server, worker):
+    # With preload_app the master imported the app and may hold pooled connections; a worker must never share
+    # the parent's sockets, so it forgets them (without closing them under the parent) and opens its own
+    if not preload_app:
+        return
+    from config import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Start the enrollment writer with the worker rather than on its first webhook, so checkouts still queued in
+    # enrollment_queue from before a restart are written straight away
+    from enrollments import enrollment_writer
+
+    enrollment_writer.wake()
@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import app, bcrypt
+from cooperative import native_thread_executor
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+# These run inside the pool, so they must stay importable module-level functions for process pools
+def _generate_password_hash(password):
+    return bcrypt.generate_password_hash(password.encode("utf-8")).decode("utf-8")
+
+
+def _check_password_hash(pw_hash, password):
+    return bcrypt.check_password_hash(pw_hash, password.encode("utf-8"))
+
+
+# Bounded pool for bcrypt work: at most `workers` hashes run at once and `max_pending` more may wait.
+# Anything beyond that is rejected straight away with PasswordPoolBusy instead of tying up a request worker.
+class PasswordPool:
+    def __init__(self, workers=2, max_pending=8, kind="thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+        self.rejected = 0
+
+    def _get_executor(self):
+        # Created lazily so each gunicorn worker builds its own pool after the fork
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = native_thread_executor(self.workers)
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy("Too many password operations in progress, try again shortly")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def generate_password_hash(self, password):
+        return self._run(_generate_password_hash, password)
+
+    def check_password_hash(self, pw_hash, password):
+        return self._run(_check_password_hash, pw_hash, password)
+
+
+password_pool = PasswordPool(
+    workers=app.config["PASSWORD_POOL_WORKERS"],
+    max_pending=app.config["PASSWORD_POOL_QUEUE"],
+    kind=app.config["PASSWORD_POOL_KIND"],
+)
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import app
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HELP = {
+    "http_request_duration_seconds": ("histogram", "Request latency by route"),
+    "http_requests_total": ("counter", "Requests by route, method and status"),
+    "db_statements_per_request": ("histogram", "SQL statements run per request"),
+    "db_time_per_request_seconds": ("histogram", "Time spent in SQL per request"),
+    "db_statements_total": ("counter", "SQL statements run by route"),
+    "nplusone_requests_total": ("counter", "Requests that repeated one statement shape more than NPLUSONE_THRESHOLD times"),
+}
+
+# IN (?, ?, ?) and VALUES rows grow with the data, not the code; collapse them so they count as one shape
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+
+
+def statement_shape(statement):
+    return _PLACEHOLDER_LIST.sub("(?)", statement)
+
+
+# Counters and histograms for this worker. Every worker periodically writes a snapshot to METRICS_DIR,
+# and /metrics sums the snapshots of all workers on the host.
+class MetricsRegistry:
+    def __init__(self, directory, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flushed_at = 0.0
+        self._path = None
+        os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "histograms": [[name, list(labels), dict(h, counts=list(h["counts"]))] for (name, labels), h in self._histograms.items()],
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at = now
+        if self._path is None:
+            # pid plus start time, so a recycled pid never overwrites an older worker's totals
+            self._path = os.path.join(self.directory, f"{os.getpid()}-{time.time_ns()}.json")
+        tmp_path = f"{self._path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, self._path)
+
+    def reset_after_fork(self):
+        self.__init__(self.directory, self.flush_interval)
+
+    # Sum of every worker's last snapshot, including workers that have since exited, so counters never go backwards
+    def collect(self):
+        self.flush(force=True)
+        counters, histograms = {}, {}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric, labels, value in snapshot["counters"]:
+                key = (metric, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for metric, labels, h in snapshot["histograms"]:
+                key = (metric, tuple(tuple(label) for label in labels))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = dict(h, counts=list(h["counts"]))
+                else:
+                    merged["counts"] = [a + b for a, b in zip(merged["counts"], h["counts"])]
+                    merged["sum"] += h["sum"]
+                    merged["count"] += h["count"]
+        return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+# Prometheus text exposition format (version 0.0.4)
+def render_prometheus(counters, histograms):
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), h in histograms.items():
+        lines = by_name.setdefault(name, [])
+        for bound, count in zip(h["buckets"], h["counts"]):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {h['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {h['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {h['count']}")
+
+    output = []
+    for name in sorted(by_name):
+        kind, help_text = HELP.get(name, ("untyped", name))
+        output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(by_name[name])
+    return "\n".join(output) + "\n"
+
+
+metrics_registry = MetricsRegistry(app.config["METRICS_DIR"], app.config["METRICS_FLUSH_INTERVAL"])
+os.register_at_fork(after_in_child=metrics_registry.reset_after_fork)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    stats = g.get("sql_stats")
+    started = getattr(context, "_metrics_started", None)
+    if stats is None or started is None:
+        return
+    stats["count"] += 1
+    stats["time"] += time.perf_counter() - started
+    stats["shapes"][statement_shape(statement)] += 1
+
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.sql_stats = {"count": 0, "time": 0.0, "shapes": Counter()}
+
+
+# Registered before the other after_request hooks, so it runs last and the latency includes them
+@app.after_request
+def _record_request_metrics(response):
+    started = g.get("request_started")
+    stats = g.get("sql_stats")
+    if started is None or stats is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = (("route", route), ("method", request.method))
+    metrics_registry.observe("http_request_duration_seconds", labels, time.perf_counter() - started, LATENCY_BUCKETS)
+    metrics_registry.inc("http_requests_total", labels + (("status", str(response.status_code)),))
+    metrics_registry.observe("db_statements_per_request", labels, stats["count"], STATEMENT_BUCKETS)
+    metrics_registry.observe("db_time_per_request_seconds", labels, stats["time"], DB_TIME_BUCKETS)
+    if stats["count"]:
+        metrics_registry.inc("db_statements_total", labels, stats["count"])
+
+    if stats["shapes"]:
+        shape, repeats = stats["shapes"].most_common(1)[0]
+        if repeats > app.config["NPLUSONE_THRESHOLD"]:
+            metrics_registry.inc("nplusone_requests_total", labels)
+            logger.warning("Possible N+1 on %s %s: statement ran %d times: %s", request.method, route, repeats, shape)
+
+    metrics_registry.flush()
+    return response
@@ -51,6 +51,20 @@ def get_metadata():
     return target_db.metadata
 
 
+# Search objects created by raw SQL in 3b7e2c9d41a6 that the models don't declare: the pg_trgm GIN indexes on
+# Postgres, and the FTS5 tables (plus their shadow tables) on SQLite. Autogenerate would otherwise drop them.
+SEARCH_INDEXES = {'ix_admins_email_trgm', 'ix_students_email_trgm'}
+SEARCH_TABLE_PREFIXES = ('admins_email_fts', 'students_email_fts')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'index' and name in SEARCH_INDEXES:
+        return False
+    if type_ == 'table' and name.startswith(SEARCH_TABLE_PREFIXES):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +79,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +108,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
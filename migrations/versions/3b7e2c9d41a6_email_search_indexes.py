@@ -0,0 +1,58 @@
+"""email search indexes
+
+Revision ID: 3b7e2c9d41a6
+Revises: f685f662cd11
+Create Date: 2026-10-18 09:12:40.118233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e2c9d41a6'
+down_revision = 'f685f662cd11'
+branch_labels = None
+depends_on = None
+
+
+SEARCHABLE_TABLES = ('admins', 'students')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Trigram GIN indexes let ILIKE '%x%' use an index instead of a full scan
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in SEARCHABLE_TABLES:
+            op.create_index(f'ix_{table}_email_trgm', table, ['email'], postgresql_using='gin',
+                            postgresql_ops={'email': 'gin_trgm_ops'})
+    elif dialect == 'sqlite':
+        # SQLite equivalent: an external-content FTS5 table with the trigram tokenizer, kept in sync by triggers
+        for table in SEARCHABLE_TABLES:
+            fts = f'{table}_email_fts'
+            op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5(email, content='{table}', content_rowid='id', tokenize='trigram')")
+            op.execute(f"""CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, email) VALUES (new.id, new.email);
+            END""")
+            op.execute(f"""CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, email) VALUES ('delete', old.id, old.email);
+            END""")
+            op.execute(f"""CREATE TRIGGER {fts}_au AFTER UPDATE OF email ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, email) VALUES ('delete', old.id, old.email);
+                INSERT INTO {fts}(rowid, email) VALUES (new.id, new.email);
+            END""")
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in SEARCHABLE_TABLES:
+            op.drop_index(f'ix_{table}_email_trgm', table_name=table)
+    elif dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            fts = f'{table}_email_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
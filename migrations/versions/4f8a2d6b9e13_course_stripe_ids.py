@@ -0,0 +1,28 @@
+"""course stripe ids
+
+Revision ID: 4f8a2d6b9e13
+Revises: e19b4f6a7c35
+Create Date: 2026-10-18 14:55:21.640918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2d6b9e13'
+down_revision = 'e19b4f6a7c35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stripe_product_id', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('stripe_price_id', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('courses', schema=None) as batch_op:
+        batch_op.drop_column('stripe_price_id')
+        batch_op.drop_column('stripe_product_id')
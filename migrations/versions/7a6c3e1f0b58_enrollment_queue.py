@@ -0,0 +1,34 @@
+"""enrollment queue
+
+Revision ID: 7a6c3e1f0b58
+Revises: 4f8a2d6b9e13
+Create Date: 2026-10-18 16:08:44.903175
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a6c3e1f0b58'
+down_revision = '4f8a2d6b9e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('enrollment_queue',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stripe_event_id', sa.String(length=255), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stripe_event_id')
+    )
+
+
+def downgrade():
+    op.drop_table('enrollment_queue')
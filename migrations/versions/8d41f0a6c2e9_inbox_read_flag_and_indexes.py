@@ -0,0 +1,30 @@
+"""inbox read flag and indexes
+
+Revision ID: 8d41f0a6c2e9
+Revises: 3b7e2c9d41a6
+Create Date: 2026-10-18 10:03:17.502611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0a6c2e9'
+down_revision = '3b7e2c9d41a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_read', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_messages_receiver_id_admin_sender_id_id', ['receiver_id', 'admin_sender_id', 'id'], unique=False)
+        batch_op.create_index('ix_messages_admin_receiver_id_id', ['admin_receiver_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_messages_admin_receiver_id_id')
+        batch_op.drop_index('ix_messages_receiver_id_admin_sender_id_id')
+        batch_op.drop_column('is_read')
@@ -0,0 +1,39 @@
+"""foreign key indexes
+
+Revision ID: b6d3f9e2a714
+Revises: 7a6c3e1f0b58
+Create Date: 2026-10-18 21:02:36.417920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d3f9e2a714'
+down_revision = '7a6c3e1f0b58'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('ix_courses_admin_id', 'courses', ['admin_id']),
+    ('ix_modules_course_id_position_id', 'modules', ['course_id', 'position', 'id']),
+    ('ix_messages_sender_id', 'messages', ['sender_id']),
+    ('ix_messages_admin_sender_id', 'messages', ['admin_sender_id']),
+    ('ix_student_courses_course_id_student_id', 'student_courses', ['course_id', 'student_id']),
+    ('ix_admin_courses_course_id', 'admin_courses', ['course_id']),
+)
+
+
+def upgrade():
+    # Built CONCURRENTLY on Postgres so a large messages table stays writable meanwhile, which can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
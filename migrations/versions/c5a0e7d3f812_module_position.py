@@ -0,0 +1,26 @@
+"""module position
+
+Revision ID: c5a0e7d3f812
+Revises: 8d41f0a6c2e9
+Create Date: 2026-10-18 11:27:05.834190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a0e7d3f812'
+down_revision = '8d41f0a6c2e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('position', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.drop_column('position')
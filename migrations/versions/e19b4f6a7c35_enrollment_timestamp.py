@@ -0,0 +1,34 @@
+"""enrollment timestamp
+
+Revision ID: e19b4f6a7c35
+Revises: c5a0e7d3f812
+Create Date: 2026-10-18 13:40:52.276014
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e19b4f6a7c35'
+down_revision = 'c5a0e7d3f812'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing enrollments have no known date, so the column is added empty and only then given its default,
+    # which then applies to new rows alone
+    with op.batch_alter_table('student_courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('enrolled_at', sa.DateTime(), nullable=True))
+
+    # SQLite can't ALTER a column's default, so the table is rebuilt there (copying the NULLs as they are)
+    recreate = 'always' if op.get_bind().dialect.name == 'sqlite' else 'auto'
+    with op.batch_alter_table('student_courses', schema=None, recreate=recreate) as batch_op:
+        batch_op.alter_column('enrolled_at', existing_type=sa.DateTime(), existing_nullable=True,
+                              server_default=sa.text('CURRENT_TIMESTAMP'))
+
+
+def downgrade():
+    with op.batch_alter_table('student_courses', schema=None) as batch_op:
+        batch_op.drop_column('enrolled_at')
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import backref
-from config import bcrypt, db
+from config import db
+from hashing import password_pool
 from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -23,11 +24,10 @@ class Student(db.Model, SerializerMixin):
     
     @password_hash.setter   
     def password_hash(self, user_password):
-        new_password_hash = bcrypt.generate_password_hash(user_password.encode("utf-8"))
-        self._password = new_password_hash.decode("utf-8")
+        self._password = password_pool.generate_password_hash(user_password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password, password.encode("utf-8"))
+        return password_pool.check_password_hash(self._password, password)
 
 class Admin(db.Model, SerializerMixin):
     __tablename__ = 'admins'
@@ -48,11 +48,10 @@ class Admin(db.Model, SerializerMixin):
     
     @password_hash.setter   
     def password_hash(self, user_password):
-        new_password_hash = bcrypt.generate_password_hash(user_password.encode("utf-8"))
-        self._password = new_password_hash.decode("utf-8")
+        self._password = password_pool.generate_password_hash(user_password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password, password.encode("utf-8"))
+        return password_pool.check_password_hash(self._password, password)
 
 class Course(db.Model, SerializerMixin):
     __tablename__ = 'courses'
@@ -63,11 +62,18 @@ class Course(db.Model, SerializerMixin):
     thumbnail = db.Column(db.String(120), nullable=True)
     price = db.Column(db.Float, nullable=False)
     admin_id = db.Column(db.Integer, db.ForeignKey('admins.id'), nullable=False)
+    stripe_product_id = db.Column(db.String(255), nullable=True)
+    stripe_price_id = db.Column(db.String(255), nullable=True)
     
-    modules = db.relationship('Module', backref='course', lazy=True)    
+    modules = db.relationship('Module', backref='course', lazy=True, order_by='(Module.position, Module.id)')
 
     serialize_only = ("title", "description", "thumbnail", "price", "admin_id")
 
+    # An admin's course list
+    __table_args__ = (
+        db.Index('ix_courses_admin_id', 'admin_id'),
+    )
+
 class Module(db.Model, SerializerMixin):
     __tablename__ = 'modules'
 
@@ -76,8 +82,14 @@ class Module(db.Model, SerializerMixin):
     media = db.Column(db.String(120), nullable=False)
     notes = db.Column(db.Text, nullable=True)
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    serialize_only = ("title", "media", "notes", "position", "course_id")
 
-    serialize_only = ("title", "media", "notes", "course_id")
+    # A course's modules in display order
+    __table_args__ = (
+        db.Index('ix_modules_course_id_position_id', 'course_id', 'position', 'id'),
+    )
 
 class Message(db.Model, SerializerMixin):
     __tablename__ = 'messages'
@@ -89,22 +101,49 @@ class Message(db.Model, SerializerMixin):
     receiver_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=True)
     admin_sender_id = db.Column(db.Integer, db.ForeignKey('admins.id', ondelete='CASCADE'), nullable=True)
     admin_receiver_id = db.Column(db.Integer, db.ForeignKey('admins.id', ondelete='CASCADE'), nullable=True)
+    is_read = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     sender = db.relationship('Student', foreign_keys=[sender_id], back_populates='sent_messages')
     receiver = db.relationship('Student', foreign_keys=[receiver_id], back_populates='received_messages')
     admin_sender = db.relationship('Admin', foreign_keys=[admin_sender_id], back_populates='sent_messages')
     admin_receiver = db.relationship('Admin', foreign_keys=[admin_receiver_id], back_populates='received_messages')
 
-    serialize_only = ("title", "content", "sender_id", "receiver_id", "admin_sender_id", "admin_receiver_id")
+    serialize_only = ("title", "content", "sender_id", "receiver_id", "admin_sender_id", "admin_receiver_id", "is_read")
+
+    # Keyset-paginated inbox reads: a student's messages from admins, and an admin's received messages.
+    # The sender indexes serve the ON DELETE CASCADE from students and admins.
+    __table_args__ = (
+        db.Index('ix_messages_receiver_id_admin_sender_id_id', 'receiver_id', 'admin_sender_id', 'id'),
+        db.Index('ix_messages_admin_receiver_id_id', 'admin_receiver_id', 'id'),
+        db.Index('ix_messages_sender_id', 'sender_id'),
+        db.Index('ix_messages_admin_sender_id', 'admin_sender_id'),
+    )
+
+# Paid checkouts waiting to be written to student_courses by the enrollment writer
+class EnrollmentEvent(db.Model, SerializerMixin):
+    __tablename__ = 'enrollment_queue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    stripe_event_id = db.Column(db.String(255), unique=True, nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id', ondelete='CASCADE'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now())
+
+    serialize_only = ("stripe_event_id", "student_id", "course_id", "created_at")
 
 # Association table for Student-Course many-to-many relationship
 student_courses = db.Table('student_courses',
     db.Column('student_id', db.Integer, db.ForeignKey('students.id'), primary_key=True),
-    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True),
+    # NULL for enrollments made before this column was added; their date was never recorded
+    db.Column('enrolled_at', db.DateTime, nullable=True, server_default=db.func.now()),
+    # The primary key leads with student_id; lookups by course (broadcast, receipt export, deletes) need their own
+    db.Index('ix_student_courses_course_id_student_id', 'course_id', 'student_id')
 )
 
 # Association table for Admin-Course many-to-many relationship
 admin_courses = db.Table('admin_courses',
     db.Column('admin_id', db.Integer, db.ForeignKey('admins.id'), primary_key=True),
-    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True)
+    db.Column('course_id', db.Integer, db.ForeignKey('courses.id'), primary_key=True),
+    db.Index('ix_admin_courses_course_id', 'course_id')
 )
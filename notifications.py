@@ -0,0 +1,106 @@
+import logging
+import select
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from config import app, db
+
+logger = logging.getLogger(__name__)
+
+INBOX_CHANNEL = "inbox_messages"
+
+
+def inbox_key(user_type, user_id):
+    return f"{user_type}:{user_id}"
+
+
+# Wakes SSE streams when a message lands in an inbox.
+# Within a worker, streams wait on a version counter per inbox key. Across workers, Postgres LISTEN/NOTIFY
+# carries the key to every worker; on other databases streams simply re-check the database every poll interval.
+class InboxNotifier:
+    def __init__(self):
+        self._versions = {}
+        self._condition = threading.Condition()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    @property
+    def cross_worker(self):
+        return db.engine.dialect.name == "postgresql"
+
+    # Call inside the transaction that inserts the message; waiters are only woken once it commits
+    def publish(self, key):
+        self.publish_many([key])
+
+    # One NOTIFY statement for any number of inboxes, e.g. a course broadcast
+    def publish_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        if self.cross_worker:
+            db.session.execute(text("SELECT pg_notify(:channel, key) FROM unnest(:keys) AS key"),
+                               {"channel": INBOX_CHANNEL, "keys": keys})
+        db.session.info.setdefault("inbox_keys", set()).update(keys)
+
+    def version(self, key):
+        with self._condition:
+            return self._versions.get(key, 0)
+
+    def wake(self, key):
+        with self._condition:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._condition.notify_all()
+
+    # Block until `key` moves past `seen` or `timeout` passes; returns the current version
+    def wait(self, key, seen, timeout):
+        if self.cross_worker:
+            self._ensure_listener()
+        with self._condition:
+            self._condition.wait_for(lambda: self._versions.get(key, 0) != seen, timeout)
+            return self._versions.get(key, 0)
+
+    def _ensure_listener(self):
+        # Started lazily so every gunicorn worker owns its own LISTEN connection after the fork
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                # LISTEN doesn't survive PgBouncer's transaction pooling, so it goes straight to Postgres when configured
+                url = app.config["DATABASE_DIRECT_URL"] or (
+                    db.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+                )
+                self._listener = threading.Thread(target=self._listen, args=(url,), daemon=True, name="inbox-listener")
+                self._listener.start()
+
+    def _listen(self, url):
+        import psycopg2
+
+        while True:
+            try:
+                connection = psycopg2.connect(url)
+                connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                connection.cursor().execute(f"LISTEN {INBOX_CHANNEL}")
+                while True:
+                    if select.select([connection], [], [], 30) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.wake(connection.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Inbox listener lost its connection, reconnecting")
+                time.sleep(app.config["SSE_POLL_INTERVAL"])
+
+
+inbox_notifier = InboxNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_inboxes(session):
+    for key in session.info.pop("inbox_keys", ()):
+        inbox_notifier.wake(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_inbox_keys(session):
+    session.info.pop("inbox_keys", None)
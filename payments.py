@@ -0,0 +1,92 @@
+import time
+
+import requests
+import stripe
+
+from config import app, db
+from cooperative import gevent_active
+
+
+def configure_stripe():
+    stripe.api_key = app.config["STRIPE_API_KEY"]
+    if app.config["STRIPE_API_BASE"]:
+        # e.g. stripe-mock or benchmarks/stripe_stub.py
+        stripe.api_base = app.config["STRIPE_API_BASE"]
+    stripe.max_network_retries = app.config["STRIPE_MAX_RETRIES"]
+    stripe.default_http_client = stripe_http_client()
+
+
+def stripe_http_client():
+    # The timeout is (connect, read)
+    timeout = (app.config["STRIPE_CONNECT_TIMEOUT"], app.config["STRIPE_READ_TIMEOUT"])
+    if not gevent_active():
+        # RequestsClient keeps one keep-alive session per thread
+        return stripe.RequestsClient(timeout=timeout)
+
+    # Under gevent each request runs on a new greenlet, so a session per "thread" would never be reused.
+    # All greenlets share one session instead, with room for STRIPE_POOL_SIZE keep-alive connections.
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=app.config["STRIPE_POOL_SIZE"])
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return stripe.RequestsClient(timeout=timeout, session=session)
+
+
+def unit_amount(course):
+    # Stripe's minimum charge is 50 cents
+    return max(int(round(course.price * 100)), 50)
+
+
+# Make sure the course has a Stripe Product and a Price matching its current title and price.
+# Nothing is sent to Stripe when the stored Price is still current; admin_courses PATCH clears it on title/price changes.
+def ensure_stripe_price(course):
+    if course.stripe_price_id:
+        return course.stripe_price_id
+
+    course_id, title, product_id, amount = course.id, course.title, course.stripe_product_id, unit_amount(course)
+    # Hand the pooled connection back while Stripe is called
+    db.session.commit()
+
+    if product_id:
+        stripe.Product.modify(product_id, name=title)
+    else:
+        product = stripe.Product.create(
+            name=title,
+            metadata={"course_id": course_id},
+            idempotency_key=f"course-{course_id}-product",
+        )
+        product_id = product.id
+
+    price = stripe.Price.create(
+        product=product_id,
+        currency="usd",
+        unit_amount=amount,
+        idempotency_key=f"course-{course_id}-price-{amount}-{product_id}",
+    )
+    course.stripe_product_id = product_id
+    course.stripe_price_id = price.id
+    db.session.commit()
+    return price.id
+
+
+def create_checkout_session(student, course, success_url, cancel_url):
+    price_id = ensure_stripe_price(course)
+    student_id, course_id = student.id, course.id
+    # No connection is held while waiting on Stripe, so slow responses can't drain the pool
+    db.session.commit()
+
+    # Repeated clicks inside one window get the same session back instead of a new one
+    window = int(time.time() // app.config["CHECKOUT_IDEMPOTENCY_WINDOW"])
+    return stripe.checkout.Session.create(
+        payment_method_types=["card"],
+        line_items=[{"price": price_id, "quantity": 1}],
+        mode="payment",
+        success_url=success_url,
+        cancel_url=cancel_url,
+        client_reference_id=str(student_id),
+        metadata={"student_id": student_id, "course_id": course_id},
+        idempotency_key=f"checkout-{student_id}-{course_id}-{price_id}-{window}",
+    )
+
+
+configure_stripe()
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import app, db
+from models import Student, Admin
+
+
+PRINCIPAL_MODELS = {
+    "student": Student,
+    "admin": Admin,
+}
+
+
+# Per-worker cache of the column values of authenticated users, keyed by (user_type, id)
+class PrincipalCache:
+    def __init__(self, ttl=300, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_type, user_id):
+        key = (user_type, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            columns, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return columns
+
+    def put(self, user_type, user_id, columns, token_exp=None):
+        # Never keep an entry around longer than the token that produced it
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[(user_type, user_id)] = (columns, expires_at)
+            self._entries.move_to_end((user_type, user_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_type, user_id):
+        with self._lock:
+            if self._entries.pop((user_type, user_id), None) is not None:
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    ttl=app.config["PRINCIPAL_CACHE_TTL"],
+    max_entries=app.config["PRINCIPAL_CACHE_SIZE"],
+)
+
+
+def _column_values(instance):
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(instance).mapper.column_attrs}
+
+
+# Resolve the user behind a decoded token, hitting the database only on a cache miss
+def load_principal(user_type, user_id, token_exp=None):
+    model = PRINCIPAL_MODELS[user_type]
+    columns = principal_cache.get(user_type, user_id)
+    if columns is not None:
+        # Rebuild the instance and attach it to this request's session without a SELECT
+        instance = model(**columns)
+        make_transient_to_detached(instance)
+        return db.session.merge(instance, load=False)
+
+    instance = db.session.get(model, user_id)
+    if instance is not None:
+        principal_cache.put(user_type, user_id, _column_values(instance), token_exp)
+    return instance
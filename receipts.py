@@ -0,0 +1,173 @@
+import copy
+import io
+import os
+import multiprocessing
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+LOGO_BOX = (100, 800, 100, 100)
+
+
+# Receipt layout with the expensive part done once per worker.
+# Encoding logo.png into a PDF image object is most of the cost of a receipt, so the encoded object is built on
+# a scratch canvas the first time and a shallow copy is registered in every new document. drawImage then finds
+# the image already present and only emits a reference to it, leaving each receipt to stamp in its own text.
+class ReceiptTemplate:
+    def __init__(self, logo_path=LOGO_PATH):
+        self.logo_path = logo_path
+        self._logo = None
+        self._lock = threading.Lock()
+
+    def _encoded_logo(self):
+        if self._logo is None:
+            with self._lock:
+                if self._logo is None:
+                    scratch = canvas.Canvas(io.BytesIO(), pagesize=letter)
+                    scratch.drawImage(self.logo_path, *LOGO_BOX)
+                    name = scratch._formsinuse[-1]
+                    reg_name = scratch._doc.getXObjectName(name)
+                    image = scratch._doc.idToObject[reg_name]
+                    # Soft masks live in a second object; those images are simply re-encoded per document
+                    self._logo = False if getattr(image, "smask", None) else (name, reg_name, image)
+        return self._logo
+
+    def _attach_logo(self, p):
+        logo = self._encoded_logo()
+        if not logo:
+            return
+        name, reg_name, image = logo
+        image = copy.copy(image)
+        image.__dict__.pop("__InternalName__", None)
+        p._setXObjects(image)
+        p._doc.Reference(image, reg_name)
+        p._doc.addForm(name, image)
+
+    def render(self, student_name, student_email, course_title, course_price, purchased_at=None):
+        pdf_buffer = io.BytesIO()
+        p = canvas.Canvas(pdf_buffer, pagesize=letter)
+        self._attach_logo(p)
+        p.drawImage(self.logo_path, *LOGO_BOX)
+
+        # Static text
+        p.drawString(100, 750, "Moringa School")
+        p.drawString(100, 730, "Thank you for enrolling in our course.")
+
+        # Variable fields
+        p.drawString(100, 710, f"Student Name: {student_name}")
+        p.drawString(100, 690, f"Email: {student_email}")
+        p.drawString(100, 670, f"Course Title: {course_title}")
+        p.drawString(100, 650, f"Course Price: ${course_price}")
+
+        # Enrollments from before student_courses recorded a date have none to print
+        purchased = purchased_at.strftime('%Y-%m-%d %H:%M:%S') if purchased_at else "unknown"
+        p.drawString(100, 100, f"Purchase Date: {purchased}")
+
+        p.showPage()
+        p.save()
+        return pdf_buffer.getvalue()
+
+
+# Per-worker LRU of rendered receipts. Keys include every field printed on the receipt, so a renamed student or
+# course simply misses and renders a fresh one.
+class ReceiptCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pdf
+            self.misses += 1
+        pdf = render()
+        with self._lock:
+            self._entries[key] = pdf
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pdf
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+receipt_template = ReceiptTemplate()
+
+
+# Receipt export: render in a process pool, write each PDF into a ZIP as soon as it is ready
+def render_receipt_job(job):
+    arcname, fields = job
+    return arcname, receipt_template.render(*fields)
+
+
+_export_pool = None
+_export_pool_lock = threading.Lock()
+
+
+def get_export_pool(workers):
+    # Spawned rather than forked: the request worker has threads, and this module doesn't import the Flask app
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None:
+            _export_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _export_pool
+
+
+# Write-only file object for ZipFile: hands back whatever has been written since the last drain.
+# It has no tell()/seek(), so ZipFile writes entries with data descriptors and never seeks back.
+class _ZipSink:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# Yields a ZIP archive in pieces. At most `window` receipts are rendering or waiting to be written at any time,
+# so memory stays flat however many jobs there are.
+def stream_receipt_zip(jobs, executor, window):
+    sink = _ZipSink()
+    pending = set()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            jobs = iter(jobs)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < window:
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(render_receipt_job, job))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    arcname, pdf = future.result()
+                    archive.writestr(arcname, pdf)
+                yield sink.drain()
+        yield sink.drain()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,174 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_app_context, has_request_context, current_app, request, session as client_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+# Seconds the replica trails the primary; zero when it has replayed everything it received
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+# Decides per request whether reads may use the replica. The replica's lag is sampled at most every
+# REPLICA_LAG_CHECK_INTERVAL seconds per worker; past REPLICA_MAX_LAG (or when the check fails) reads fall back
+# to the primary. A user whose own last write the replica may not have replayed yet also reads from the primary.
+# That write time travels with the client in the signed session cookie, since their next request usually lands on
+# another worker; each worker's own record covers clients that don't send cookies back.
+class ReplicaRouter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_writes = {}
+        self.lag = None
+        self.checked_at = 0.0
+        self.replica_requests = 0
+        self.primary_requests = 0
+        self.lag_fallbacks = 0
+
+    def _engine(self):
+        return current_app.extensions["sqlalchemy"].engines.get(REPLICA_BIND)
+
+    def _refresh_lag(self, engine):
+        now = time.time()
+        with self._lock:
+            if now - self.checked_at < current_app.config["REPLICA_LAG_CHECK_INTERVAL"]:
+                return
+            # Claim the check so concurrent requests keep using the previous sample
+            self.checked_at = now
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(POSTGRES_LAG_SQL).scalar()) if engine.dialect.name == "postgresql" else 0.0
+        except Exception:
+            current_app.logger.exception("Replica lag check failed, reading from the primary")
+            lag = None
+        with self._lock:
+            self.lag = lag
+
+    def _usable(self):
+        return self.lag is not None and self.lag <= current_app.config["REPLICA_MAX_LAG"]
+
+    # True when the replica is known to have replayed everything committed on the primary up to `timestamp`
+    def current_as_of(self, timestamp):
+        with self._lock:
+            return self._usable() and self.checked_at - self.lag >= timestamp
+
+    def note_write(self, principal_key):
+        written_at = time.time()
+        if has_request_context():
+            client_session["last_write"] = [principal_key, written_at]
+        with self._lock:
+            self._last_writes[principal_key] = written_at
+            # Entries older than the fallback threshold can no longer pin anyone to the primary
+            if len(self._last_writes) > 10000:
+                cutoff = time.time() - current_app.config["REPLICA_MAX_LAG"] - current_app.config["REPLICA_LAG_CHECK_INTERVAL"]
+                self._last_writes = {k: v for k, v in self._last_writes.items() if v >= cutoff}
+
+    # The last write this principal's client reported, from whichever worker served it
+    @staticmethod
+    def _client_last_write(principal_key):
+        if principal_key is None or not has_request_context():
+            return None
+        last_write = client_session.get("last_write")
+        if isinstance(last_write, list) and len(last_write) == 2 and last_write[0] == principal_key:
+            return last_write[1]
+        return None
+
+    def should_route(self, principal_key=None):
+        engine = self._engine()
+        if engine is None:
+            return False
+        self._refresh_lag(engine)
+        client_write = self._client_last_write(principal_key)
+        with self._lock:
+            last_write = max(filter(None, (self._last_writes.get(principal_key), client_write)), default=None)
+            if not self._usable():
+                self.lag_fallbacks += 1
+                self.primary_requests += 1
+                return False
+            if last_write is not None and self.checked_at - self.lag < last_write:
+                self.primary_requests += 1
+                return False
+            self.replica_requests += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "configured": self._engine() is not None,
+                "lag_seconds": self.lag,
+                "checked_at": self.checked_at,
+                "replica_requests": self.replica_requests,
+                "primary_requests": self.primary_requests,
+                "lag_fallbacks": self.lag_fallbacks,
+            }
+
+
+replica_router = ReplicaRouter()
+
+
+# db.session class: while a @replica_reads view runs, plain reads go to the replica bind. Flushes, INSERT/UPDATE/DELETE
+# and every statement after the session's first write stay on the primary.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and has_app_context()
+            and g.get("use_replica")
+            and not self._flushing
+            and not self.info.get("wrote")
+            and not isinstance(clause, UpdateBase)
+        ):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = session.info["pending_write"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = orm_execute_state.session.info["pending_write"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _committed(session):
+    if session.info.pop("pending_write", False) and has_app_context() and g.get("principal_key"):
+        replica_router.note_write(g.principal_key)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("pending_write", None)
+
+
+# Marks a view whose GET requests only read. Put it under @token_required so the user is known and their own
+# writes are honoured; other methods on the same route always use the primary.
+def replica_reads(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        g.use_replica = request.method in ("GET", "HEAD") and replica_router.should_route(g.get("principal_key"))
+        return f(*args, **kwargs)
+    return wrapper
+
+
+# Run a block of a replica-routed view against the primary
+@contextmanager
+def primary():
+    previous = g.get("use_replica")
+    g.use_replica = False
+    try:
+        yield
+    finally:
+        g.use_replica = previous
@@ -0,0 +1,50 @@
+from sqlalchemy import func, inspect, text, column
+
+from config import app, db
+
+
+_fts_tables = {}
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _has_fts_table(name):
+    # The FTS5 tables come from the email search migration; databases built with db.create_all() won't have them
+    if name not in _fts_tables:
+        _fts_tables[name] = inspect(db.engine).has_table(name)
+    return _fts_tables[name]
+
+
+# Typeahead search over a model's email column: prefix matches first, then the best substring matches.
+# Postgres uses the pg_trgm GIN index, SQLite the FTS5 trigram table; anything else falls back to a bounded LIKE.
+def search_emails(model, query):
+    query = query.strip()
+    if len(query) < app.config["SEARCH_MIN_QUERY_LENGTH"]:
+        return []
+
+    escaped = _escape_like(query)
+    contains = model.email.ilike(f"%{escaped}%", escape="\\")
+    is_prefix = model.email.ilike(f"{escaped}%", escape="\\")
+    ranking = [is_prefix.desc()]
+
+    dialect = db.engine.dialect.name
+    table = model.__tablename__
+    if dialect == "postgresql":
+        matches = contains
+        ranking.append(func.similarity(model.email, query).desc())
+    elif dialect == "sqlite" and _has_fts_table(f"{table}_email_fts"):
+        phrase = '"' + query.replace('"', '""') + '"'
+        matched_ids = text(f"SELECT rowid FROM {table}_email_fts WHERE {table}_email_fts MATCH :phrase") \
+            .bindparams(phrase=phrase).columns(column("rowid"))
+        matches = model.id.in_(matched_ids)
+    else:
+        matches = contains
+
+    ranking += [func.length(model.email), model.email]
+    return db.session.query(model.id, model.email) \
+        .filter(matches) \
+        .order_by(*ranking) \
+        .limit(app.config["SEARCH_RESULT_LIMIT"]) \
+        .all()
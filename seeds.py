@@ -1,11 +1,43 @@
+import argparse
+import csv
+import io
+import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 from config import db, app
-from models import Student, Admin, Course, Module, Message
+from hashing import _generate_password_hash
+from models import Student, Admin, Course, Module, Message, admin_courses, student_courses
 from faker import Faker
-import random
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 fake = Faker()
 
+# Column values for one row of each table, without passwords or foreign keys. The ORM generators below and
+# the scaled seeding in benchmarks/suite.py both build on them; `n` keeps emails and usernames unique at any scale.
+def fake_student_row(n):
+    username = f"{fake.user_name()}{n}"
+    return {"email": f"{username}@{fake.free_email_domain()}", "username": username}
+
+def fake_admin_row(n):
+    return {"email": f"{fake.user_name()}{n}@{fake.domain_name()}"}
+
+def fake_course_row():
+    return {
+        "title": fake.sentence(nb_words=4),
+        "description": fake.paragraph(),
+        "thumbnail": fake.image_url(),
+        "price": float(f"{random.uniform(10, 100):.02f}"),
+    }
+
+def fake_module_row():
+    # Using url() to generate a fake URL
+    return {"title": fake.sentence(nb_words=3), "media": fake.url(), "notes": fake.paragraph()}
+
+def fake_message_row():
+    return {"title": fake.sentence(nb_words=6), "content": fake.paragraph(nb_sentences=3)}
+
 # Function to generate fake data for Student
 def generate_fake_student():
     email = fake.email()
@@ -27,36 +59,27 @@ def generate_fake_admin():
 
 # Function to generate fake data for Course
 def generate_fake_course(admin):
-    title = fake.sentence(nb_words=4)
-    description = fake.paragraph()
-    thumbnail = fake.image_url()
-    price = float(f"{random.uniform(10, 100):.02f}")
-    course = Course(title=title, description=description, thumbnail=thumbnail, price=price, admin_id=admin.id)
-    return course
+    return Course(**fake_course_row(), admin_id=admin.id)
 
 # Function to generate fake data for Module
 def generate_fake_module(course):
-    title = fake.sentence(nb_words=3)
-    media = fake.url()  # Using url() to generate a fake URL
-    notes = fake.paragraph()
-    return Module(title=title, media=media, notes=notes, course=course)
+    return Module(**fake_module_row(), course=course)
 
 # Function to generate fake data for Message
 def generate_fake_message(admin, student):
-    title = fake.sentence(nb_words=6)
-    content = fake.paragraph(nb_sentences=3)
-    
+    row = fake_message_row()
+
     # Determine whether admin or student is the sender and receiver randomly
     is_admin_sender = random.choice([True, False])
     
     if is_admin_sender:
         admin_sender_id = admin.id
         student_receiver_id = student.id
-        return Message(title=title, content=content, admin_sender_id=admin_sender_id, receiver_id=student_receiver_id)
+        return Message(**row, admin_sender_id=admin_sender_id, receiver_id=student_receiver_id)
     else:
         student_sender_id = student.id
         admin_receiver_id = admin.id
-        return Message(title=title, content=content, sender_id=student_sender_id, admin_receiver_id=admin_receiver_id)
+        return Message(**row, sender_id=student_sender_id, admin_receiver_id=admin_receiver_id)
 
 # Seed function to populate the database
 def seed_database():
@@ -119,5 +142,200 @@ def seed_database():
             db.session.rollback()
             print("❌ Seeding failed:", str(e))
 
+# Bulk mode: millions of rows in minutes instead of one ORM object, bcrypt hash and commit at a time.
+# Every user gets the same precomputed hash of BULK_PASSWORD unless hash_passwords is set, in which case each gets
+# "<name>@1234" like seed_database, hashed on all cores.
+BULK_PASSWORD = "seed@1234"
+
+
+def _batched(rows, size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+# Cycles through `size` rows from `generator` instead of calling Faker for every row; 0 calls it every time
+def _pooled(generator, size):
+    if not size:
+        while True:
+            yield generator()
+    pool = [generator() for _ in range(size)]
+    while True:
+        yield random.choice(pool)
+
+
+# Pooled rows repeat, so unique columns get the row number appended to the local part of the email
+def _numbered_email(email, n):
+    local, _, domain = email.partition("@")
+    return f"{local}{n}@{domain}"
+
+
+# Writes rows in batches of batch_size, one commit per batch: COPY on Postgres through psycopg2, executemany elsewhere
+class BulkWriter:
+    def __init__(self, connection, batch_size, log):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.log = log
+        self.use_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+
+    def _copy(self, table, batch):
+        columns = list(batch[0])
+        buffer = io.StringIO()
+        # An empty unquoted CSV field is NULL to COPY
+        csv.writer(buffer).writerows([row[column] for column in columns] for row in batch)
+        buffer.seek(0)
+        quote = self.connection.dialect.identifier_preparer.quote
+        cursor = self.connection.connection.driver_connection.cursor()
+        cursor.copy_expert(f"COPY {quote(table.name)} ({', '.join(quote(c) for c in columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        # COPY ran on the DBAPI cursor, outside any SQLAlchemy transaction, so Connection.commit() would not
+        # commit it and the rows would be rolled back when the connection goes back to the pool
+        self.connection.connection.commit()
+
+    def write(self, table, rows, total, label):
+        started = time.perf_counter()
+        done = reported = 0
+        for batch in _batched(rows, self.batch_size):
+            if self.use_copy:
+                self._copy(table, batch)
+            else:
+                self.connection.execute(table.insert(), batch)
+                self.connection.commit()
+            done += len(batch)
+            if done - reported >= total / 10 and done < total:
+                self.log(f"   {label}: {done:,}/{total:,}")
+                reported = done
+        elapsed = time.perf_counter() - started
+        self.log(f"✅ {label}: {done:,} rows in {elapsed:.1f}s ({done / max(elapsed, 1e-9):,.0f} rows/s)")
+        return done
+
+
+def _with_passwords(rows, password, hash_passwords, batch_size):
+    if not hash_passwords:
+        password_hash = _generate_password_hash(password)
+        for row in rows:
+            row["_password"] = password_hash
+            yield row
+        return
+    with ProcessPoolExecutor() as pool:
+        for batch in _batched(rows, batch_size):
+            passwords = [f"{row.get('username') or row['email'].split('@')[0]}@1234" for row in batch]
+            for row, password_hash in zip(batch, pool.map(_generate_password_hash, passwords, chunksize=64)):
+                row["_password"] = password_hash
+                yield row
+
+
+def _new_ids(connection, column, after):
+    return connection.execute(select(column).where(column > after).order_by(column)).scalars().all()
+
+
+def _max_id(connection, column):
+    return connection.execute(select(func.coalesce(func.max(column), 0))).scalar()
+
+
+# Adds `students` students, `courses` courses (one admin per 20 unless `admins` is given), `modules` modules and
+# `enrollments` enrollments per course/student on average, and `messages` messages between random students and admins.
+# Must run inside an app context.
+def bulk_seed(students, courses, messages, admins=None, modules=5, enrollments=3, batch_size=10000, text_pool=1000,
+              password=BULK_PASSWORD, hash_passwords=False, seed=None, log=print):
+    if seed is not None:
+        random.seed(seed)
+        Faker.seed(seed)
+    admins = admins or max(1, courses // 20)
+    started = time.perf_counter()
+
+    with db.engine.connect() as connection:
+        writer = BulkWriter(connection, batch_size, log)
+
+        admin_id_before = _max_id(connection, Admin.id)
+        admin_pool = _pooled(lambda: fake_admin_row(""), text_pool)
+        writer.write(Admin.__table__, _with_passwords(
+            ({"email": _numbered_email(next(admin_pool)["email"], admin_id_before + n)} for n in range(1, admins + 1)),
+            password, hash_passwords, batch_size
+        ), admins, "admins")
+        admin_ids = _new_ids(connection, Admin.id, admin_id_before)
+
+        student_id_before = _max_id(connection, Student.id)
+        student_pool = _pooled(lambda: fake_student_row(""), text_pool)
+
+        def student_rows():
+            for n in range(student_id_before + 1, student_id_before + students + 1):
+                row = next(student_pool)
+                yield {"email": _numbered_email(row["email"], n), "username": f"{row['username']}{n}"}
+
+        writer.write(Student.__table__, _with_passwords(student_rows(), password, hash_passwords, batch_size),
+                     students, "students")
+        student_ids = _new_ids(connection, Student.id, student_id_before)
+
+        course_id_before = _max_id(connection, Course.id)
+        course_pool = _pooled(fake_course_row, text_pool)
+        writer.write(Course.__table__, (
+            {**next(course_pool), "admin_id": random.choice(admin_ids)} for _ in range(courses)
+        ), courses, "courses")
+        course_ids = _new_ids(connection, Course.id, course_id_before)
+
+        # Every new course is linked to its owner in one INSERT ... SELECT
+        connection.execute(admin_courses.insert().from_select(
+            ["admin_id", "course_id"], select(Course.admin_id, Course.id).where(Course.id > course_id_before)
+        ))
+        connection.commit()
+        log(f"✅ admin_courses: {len(course_ids):,} rows")
+
+        # Between 2 and 2 x modules - 2 modules per course
+        module_counts = [random.randint(2, max(2, 2 * modules - 2)) for _ in course_ids]
+        module_pool = _pooled(fake_module_row, text_pool)
+        writer.write(Module.__table__, (
+            {**next(module_pool), "course_id": course_id, "position": position}
+            for course_id, count in zip(course_ids, module_counts) for position in range(1, count + 1)
+        ), sum(module_counts), "modules")
+
+        enrollment_counts = [min(len(course_ids), random.randint(0, 2 * enrollments)) for _ in student_ids]
+        writer.write(student_courses, (
+            {"student_id": student_id, "course_id": course_id}
+            for student_id, count in zip(student_ids, enrollment_counts) for course_id in random.sample(course_ids, count)
+        ), sum(enrollment_counts), "student_courses")
+
+        message_pool = _pooled(fake_message_row, text_pool)
+
+        def message_rows():
+            for _ in range(messages):
+                admin_id, student_id = random.choice(admin_ids), random.choice(student_ids)
+                from_admin = random.random() < 0.5
+                yield {
+                    **next(message_pool),
+                    "admin_sender_id": admin_id if from_admin else None,
+                    "receiver_id": student_id if from_admin else None,
+                    "sender_id": None if from_admin else student_id,
+                    "admin_receiver_id": None if from_admin else admin_id,
+                    "is_read": random.random() < 0.7,
+                }
+
+        writer.write(Message.__table__, message_rows(), messages, "messages")
+
+    log(f"✅ Bulk seeding completed in {time.perf_counter() - started:.1f}s"
+        + ("" if hash_passwords else f", every user's password is {password}"))
+
+
 if __name__ == '__main__':
-    seed_database()
+    parser = argparse.ArgumentParser(description="Seed the database with fake data")
+    parser.add_argument("--bulk", action="store_true", help="bulk mode for large datasets")
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--admins", type=int, help="defaults to one admin per 20 courses")
+    parser.add_argument("--modules", type=int, default=5, help="average modules per course")
+    parser.add_argument("--enrollments", type=int, default=3, help="average enrollments per student")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--text-pool", type=int, default=1000,
+                        help="distinct fake values to cycle through per table, 0 for a fresh one every row")
+    parser.add_argument("--hash-passwords", action="store_true", help="hash a distinct password per user on all cores")
+    parser.add_argument("--seed", type=int, help="random seed, for reproducible data")
+    args = parser.parse_args()
+
+    if not args.bulk:
+        seed_database()
+    else:
+        with app.app_context():
+            db.create_all()
+            bulk_seed(args.students, args.courses, args.messages, admins=args.admins, modules=args.modules,
+                      enrollments=args.enrollments, batch_size=args.batch_size, text_pool=args.text_pool,
+                      hash_passwords=args.hash_passwords, seed=args.seed)
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# config.py reads the environment on import, so everything is set before the app is loaded. Tests run on a
+# throwaway SQLite database unless TEST_DATABASE_URL points at a disposable Postgres one.
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ["CATALOG_CACHE_DIR"] = os.path.join(_tmp, "catalog")
+os.environ["METRICS_DIR"] = os.path.join(_tmp, "metrics")
+# The "replica" is the same database, so read routing runs without a second server
+os.environ["DATABASE_REPLICA_URL"] = os.environ["DATABASE_URL"]
+os.environ["STRIPE_WEBHOOK_SECRET"] = "whsec_test"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+
+WEBHOOK_SECRET = os.environ["STRIPE_WEBHOOK_SECRET"]
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+
+    return app
+
+
+@pytest.fixture(autouse=True)
+def db(app):
+    from catalog_cache import catalog_cache
+    from config import db
+    from principals import principal_cache
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    # Ids are reused once the tables are recreated, so nothing cached per worker may survive a test
+    principal_cache.clear()
+    catalog_cache.bump()
+    yield db
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Signs up and logs in a student or admin, returning the headers for authenticated requests
+@pytest.fixture
+def login(client):
+    def login(kind, email, password="password", **fields):
+        response = client.post(f"/signup/{kind}", json={"email": email, "password": password, **fields})
+        assert response.status_code == 201, response.data
+        response = client.post(f"/{kind}/login", json={"email": email, "password": password})
+        assert response.status_code == 200, response.data
+        return {"jwttoken": response.json["token"]}
+
+    return login
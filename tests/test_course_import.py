@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from gunicorn.http.body import Body, LengthReader
+from gunicorn.http.unreader import IterUnreader
+
+from course_import import PARSERS, RowError, validate_course
+
+COURSE = {"title": "Course", "description": "About", "price": 10,
+          "modules": [{"title": "Module", "media": "https://example.com/m"}]}
+
+
+# The request body as a gunicorn worker hands it over: a file-like object that only has read()
+def gunicorn_body(data):
+    return Body(LengthReader(IterUnreader([data]), len(data)))
+
+
+def test_parsers_read_a_gunicorn_request_body():
+    rows = {
+        "ndjson": (json.dumps(COURSE) + "\n") * 2,
+        "json": json.dumps([COURSE, COURSE]),
+        "csv": "title,description,price,module_title,module_media\nCourse,About,10,Module,https://example.com/m\n",
+    }
+    for file_format, data in rows.items():
+        parsed = list(PARSERS[file_format](gunicorn_body(data.encode())))
+        assert parsed and all(isinstance(record, dict) for _, record in parsed), file_format
+
+
+@pytest.mark.parametrize("change, error", [
+    ({"title": 5}, "title must be a string"),
+    ({"title": "t" * 121}, "title must be at most 120 characters"),
+    ({"description": ["About"]}, "description must be a string"),
+    ({"thumbnail": "https://example.com/" + "t" * 120}, "thumbnail must be at most 120 characters"),
+    ({"thumbnail": 7}, "thumbnail must be a string"),
+    ({"price": float("nan")}, "price must be a finite number"),
+    ({"price": "inf"}, "price must be a finite number"),
+    ({"price": True}, "price must be a number"),
+    ({"modules": "Module"}, "modules must be a list"),
+    ({"modules": [{"title": "m" * 121, "media": "https://example.com/m"}]}, "module 1 title must be at most 120 characters"),
+    ({"modules": [{"title": "Module", "media": "https://example.com/" + "m" * 120}]}, "module 1 media must be at most 120 characters"),
+    ({"modules": [{"title": "Module", "media": 3}]}, "module 1 media must be a string"),
+    ({"modules": [{"title": "Module", "media": "https://example.com/m", "notes": {}}]}, "module 1 notes must be a string"),
+    ({"modules": [{"title": "Module", "media": "https://example.com/m", "position": "1"}]}, "module 1 position must be an integer"),
+])
+def test_validate_course_rejects_bad_fields(change, error):
+    with pytest.raises(RowError, match=error):
+        validate_course({**COURSE, **change})
+
+
+def test_bad_rows_are_reported_without_failing_the_import(db, client, login):
+    headers = login("admin", "admin@example.com")
+    rows = [COURSE, {**COURSE, "title": 5}, {**COURSE, "price": float("nan")},
+            {**COURSE, "modules": [{"title": "Module", "media": "https://example.com/" + "m" * 120}]}]
+    body = "".join(json.dumps(row) + "\n" for row in rows)
+    response = client.post("/courses/admin/import?format=ndjson", data=body,
+                           headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 207
+    assert response.json["courses_imported"] == 1
+    assert [error["row"] for error in response.json["errors"]] == [2, 3, 4]
+
+
+def test_courses_committed_before_a_failure_are_listed(app, client, login, monkeypatch):
+    monkeypatch.setitem(app.config, "IMPORT_BATCH_SIZE", 1)
+    headers = login("admin", "admin@example.com")
+    assert client.get("/course").json["courses"] == []
+
+    # Rows decoded ahead of the undecodable bytes commit one per batch, then the import fails. The valid part has
+    # to outgrow the text decoder's read-ahead for any row to get that far.
+    body = (json.dumps(COURSE) + "\n").encode() * 200 + b"\xff\xfe\n"
+    response = client.post("/courses/admin/import?format=ndjson", data=body,
+                           headers={**headers, "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 500
+    assert response.json["courses_imported"] > 0
+    assert client.get("/course").json["courses"]
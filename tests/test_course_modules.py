@@ -0,0 +1,95 @@
+import psycopg2.extensions
+import pytest
+from sqlalchemy import event
+
+MODULES = [{"title": f"Module {n}", "media": f"https://example.com/{n}"} for n in range(1, 21)]
+
+
+def create_course(client, headers):
+    course = {"title": "Course", "description": "About", "price": 10, "modules": MODULES}
+    response = client.post("/courses/admin", json=course, headers=headers)
+    assert response.status_code == 201, response.data
+    return response.json["course_id"]
+
+
+def module_ids(client, headers, course_id):
+    modules = client.get(f"/student/course/{course_id}/module", headers=headers).json
+    return [module["id"] for module in modules]
+
+
+def test_only_the_owner_may_patch_a_course(client, login):
+    owner = login("admin", "owner@example.com")
+    course_id = create_course(client, owner)
+    for headers in (login("admin", "other@example.com"), login("student", "student@example.com", username="student")):
+        response = client.patch("/courses/admin", json={"course_id": course_id, "title": "Taken"}, headers=headers)
+        assert response.status_code == 403
+
+
+@pytest.mark.parametrize("change", [
+    {"modules": None},
+    {"modules": [1]},
+    {"modules": [{"id": "1", "title": "Module"}]},
+    {"deleted_module_ids": 1},
+    {"deleted_module_ids": ["1"]},
+])
+def test_malformed_module_changes_are_rejected(client, login, change):
+    headers = login("admin", "owner@example.com")
+    course_id = create_course(client, headers)
+    response = client.patch("/courses/admin", json={"course_id": course_id, **change}, headers=headers)
+    assert response.status_code == 400
+
+
+def test_patch_updates_every_module(client, login):
+    headers = login("admin", "owner@example.com")
+    student = login("student", "student@example.com", username="student")
+    course_id = create_course(client, headers)
+    ids = module_ids(client, student, course_id)
+
+    changes = [{"id": module_id, "title": f"Renamed {module_id}"} for module_id in ids]
+    response = client.patch("/courses/admin", json={"course_id": course_id, "modules": changes}, headers=headers)
+    assert response.json["modules"] == {"created": 0, "updated": len(ids), "deleted": 0}
+    modules = client.get(f"/student/course/{course_id}/module", headers=student).json
+    assert [module["title"] for module in modules] == [f"Renamed {module_id}" for module_id in ids]
+
+
+# Counts what each cursor sends to Postgres: execute() is one round trip, executemany() one per parameter set
+class RoundTripCursor(psycopg2.extensions.cursor):
+    round_trips = []
+
+    def execute(self, query, vars=None):
+        self.round_trips.append(query if isinstance(query, str) else query.decode())
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        self.round_trips.extend([query if isinstance(query, str) else query.decode()] * len(vars_list))
+        return super().executemany(query, vars_list)
+
+
+def test_module_updates_take_one_round_trip_on_postgres(app, db, client, login):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.driver != "psycopg2":
+        pytest.skip("needs TEST_DATABASE_URL pointing at Postgres through psycopg2")
+
+    headers = login("admin", "owner@example.com")
+    student = login("student", "student@example.com", username="student")
+    course_id = create_course(client, headers)
+    ids = module_ids(client, student, course_id)
+
+    def use_counting_cursor(dbapi_connection, connection_record):
+        dbapi_connection.cursor_factory = RoundTripCursor
+
+    engine.dispose()
+    event.listen(engine, "connect", use_counting_cursor)
+    RoundTripCursor.round_trips.clear()
+    try:
+        changes = [{"id": module_id, "title": f"Renamed {module_id}"} for module_id in ids]
+        response = client.patch("/courses/admin", json={"course_id": course_id, "modules": changes}, headers=headers)
+    finally:
+        event.remove(engine, "connect", use_counting_cursor)
+        engine.dispose()
+
+    assert response.json["modules"]["updated"] == len(ids)
+    updates = [query for query in RoundTripCursor.round_trips if query.lstrip().upper().startswith("UPDATE MODULES")]
+    assert len(updates) == 1
@@ -0,0 +1,43 @@
+import datetime
+import io
+
+from reportlab import rl_config
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from receipts import LOGO_BOX, LOGO_PATH, ReceiptTemplate
+
+FIELDS = ("Student", "student@example.com", "Intro to Flask", 49.99)
+PURCHASED_AT = datetime.datetime(2026, 1, 2, 3, 4, 5)
+
+
+# The receipt drawn on a fresh canvas with no shared logo, as generate_receipt did before the template
+def render_from_scratch(name, email, title, price, purchased_at):
+    pdf_buffer = io.BytesIO()
+    p = canvas.Canvas(pdf_buffer, pagesize=letter)
+    p.drawImage(LOGO_PATH, *LOGO_BOX)
+    p.drawString(100, 750, "Moringa School")
+    p.drawString(100, 730, "Thank you for enrolling in our course.")
+    p.drawString(100, 710, f"Student Name: {name}")
+    p.drawString(100, 690, f"Email: {email}")
+    p.drawString(100, 670, f"Course Title: {title}")
+    p.drawString(100, 650, f"Course Price: ${price}")
+    p.drawString(100, 100, f"Purchase Date: {purchased_at.strftime('%Y-%m-%d %H:%M:%S')}")
+    p.showPage()
+    p.save()
+    return pdf_buffer.getvalue()
+
+
+# ReceiptTemplate reaches into reportlab internals (_formsinuse, _doc.idToObject, _setXObjects). In invariant mode
+# both renders are deterministic, so any change in how reportlab stores images shows up as a byte difference here
+# instead of as broken PDFs in production.
+def test_template_matches_a_from_scratch_render(monkeypatch):
+    monkeypatch.setattr(rl_config, "invariant", 1)
+    template = ReceiptTemplate()
+    expected = render_from_scratch(*FIELDS, PURCHASED_AT)
+
+    first = template.render(*FIELDS, PURCHASED_AT)
+    assert template._encoded_logo(), "logo.png is no longer shared between receipts"
+    assert first == expected
+    # Later receipts reuse the encoded logo from the first
+    assert template.render(*FIELDS, PURCHASED_AT) == expected
@@ -0,0 +1,35 @@
+import time
+
+import replica
+from replica import ReplicaRouter
+
+
+# A fresh router stands in for another gunicorn worker: it has no record of writes served elsewhere. Its replica
+# reports 3 seconds of lag (within REPLICA_MAX_LAG), sampled just now, so nothing written since has been replayed.
+def worker(app, monkeypatch):
+    monkeypatch.setitem(app.config, "REPLICA_LAG_CHECK_INTERVAL", 3600)
+    router = ReplicaRouter()
+    router.lag, router.checked_at = 3.0, time.time()
+    monkeypatch.setattr(replica, "replica_router", router)
+    return router
+
+
+def test_reads_after_a_write_on_another_worker_use_the_primary(app, client, login, monkeypatch):
+    headers = login("student", "student@example.com", username="student")
+    worker(app, monkeypatch)
+    assert client.post("/profile/student", json={"username": "renamed"}, headers=headers).status_code == 200
+
+    reader = worker(app, monkeypatch)
+    assert client.get("/courses/student", headers=headers).status_code == 200
+    assert (reader.primary_requests, reader.replica_requests) == (1, 0)
+
+    # Another client of the same user hasn't written anything, so it may read from the replica
+    assert app.test_client().get("/courses/student", headers=headers).status_code == 200
+    assert reader.replica_requests == 1
+
+
+def test_reads_without_recent_writes_use_the_replica(app, client, login, monkeypatch):
+    headers = login("student", "student@example.com", username="student")
+    reader = worker(app, monkeypatch)
+    assert client.get("/courses/student", headers=headers).status_code == 200
+    assert (reader.primary_requests, reader.replica_requests) == (0, 1)
@@ -0,0 +1,23 @@
+from sqlalchemy import func, select
+
+from models import Admin, Course, Message, Module, Student, admin_courses, student_courses
+from seeds import bulk_seed
+
+
+def test_bulk_seed_commits_every_table(app, db):
+    with app.app_context():
+        bulk_seed(40, 10, 50, modules=3, enrollments=2, batch_size=7, seed=1, log=lambda line: None)
+        db.session.remove()
+
+    # Counted on a fresh connection, so rows left in an uncommitted transaction don't show up
+    with app.app_context(), db.engine.connect() as connection:
+        def count(table):
+            return connection.execute(select(func.count()).select_from(table)).scalar()
+
+        assert count(Admin.__table__) == 1
+        assert count(Student.__table__) == 40
+        assert count(Course.__table__) == 10
+        assert count(admin_courses) == 10
+        assert count(Module.__table__) >= 2 * 10
+        assert count(student_courses) > 0
+        assert count(Message.__table__) == 50
@@ -0,0 +1,53 @@
+import hashlib
+import hmac
+import json
+import time
+
+import stripe
+from sqlalchemy import func, select
+
+from conftest import WEBHOOK_SECRET
+from models import Admin, Course, EnrollmentEvent, Student
+
+
+def signed(payload, timestamp):
+    signature = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return {"Content-Type": "application/json", "Stripe-Signature": f"t={timestamp},v1={signature}"}
+
+
+def checkout_completed(app, db):
+    with app.app_context():
+        admin = Admin(email="admin@example.com", _password="x")
+        student = Student(email="student@example.com", username="student", _password="x")
+        db.session.add_all([admin, student])
+        db.session.flush()
+        course = Course(title="Course", description="Course", price=10, admin_id=admin.id)
+        db.session.add(course)
+        db.session.commit()
+        metadata = {"student_id": str(student.id), "course_id": str(course.id)}
+    return json.dumps({
+        "id": "evt_test", "type": "checkout.session.completed",
+        "data": {"object": {"payment_status": "paid", "metadata": metadata}},
+    })
+
+
+def queued(app, db):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(EnrollmentEvent))
+
+
+def test_webhook_accepts_a_fresh_signature(app, db, client, monkeypatch):
+    # Leave the event in the queue rather than have the writer drain it
+    monkeypatch.setattr("app.enrollment_writer.wake", lambda: None)
+    payload = checkout_completed(app, db)
+    response = client.post("/stripe/webhook", data=payload, headers=signed(payload, int(time.time())))
+    assert response.status_code == 200
+    assert queued(app, db) == 1
+
+
+def test_webhook_rejects_a_replayed_signature(app, db, client):
+    payload = checkout_completed(app, db)
+    stale = int(time.time()) - stripe.Webhook.DEFAULT_TOLERANCE - 60
+    response = client.post("/stripe/webhook", data=payload, headers=signed(payload, stale))
+    assert response.status_code == 400
+    assert queued(app, db) == 0